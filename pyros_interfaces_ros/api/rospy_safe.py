@@ -171,6 +171,28 @@ class MasterAPI_safe(object):
             else:
                 return res
 
+    def subscribeParam(self, caller_api, key):
+        res = None
+        while res is None:
+            try:
+                res = self.ms_proxy.subscribeParam(caller_api, key)
+            except (socket.error, socket.herror, socket.gaierror) as e:
+                rospy.logerr("Pyros : got socket error calling MasterAPI_safe:subscribeParam({caller_api}, {key}). Retrying...".format(**locals()))
+                time.sleep(retry_timeout)
+            else:
+                return res
+
+    def unsubscribeParam(self, caller_api, key):
+        res = None
+        while res is None:
+            try:
+                res = self.ms_proxy.unsubscribeParam(caller_api, key)
+            except (socket.error, socket.herror, socket.gaierror) as e:
+                rospy.logerr("Pyros : got socket error calling MasterAPI_safe:unsubscribeParam({caller_api}, {key}). Retrying...".format(**locals()))
+                time.sleep(retry_timeout)
+            else:
+                return res
+
 
 def get_master():
     res = None
@@ -184,12 +206,18 @@ def get_master():
         else:
             return res
 
+def get_node_uri():
+    # local call, no need to guard against socket errors
+    return rospy.core.get_node_uri()
+
+
 # Forwarding class definitions
 Subscriber = rospy.Subscriber
 Publisher = rospy.Publisher
 Service = rospy.Service
 ServiceProxy = rospy.ServiceProxy
 ServiceException = rospy.ServiceException
+AnyMsg = rospy.AnyMsg
 
 rostime = rospy.rostime
 
@@ -205,9 +233,11 @@ __all__ = [
     'get_name',
     'get_param_names',
     'get_master',
+    'get_node_uri',
     'Publisher',
     'Subscriber',
     'Service',
     'ServiceProxy',
+    'AnyMsg',
     'rostime',
 ]
\ No newline at end of file
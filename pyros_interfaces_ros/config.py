@@ -12,6 +12,24 @@ TOPICS = []
 SERVICES = []
 PARAMS = []
 
+# per topic options, as a dict {topic regex: options}
+# max_rate limits the rate of messages stored (publishers) or published (subscribers), keeping the latest one.
+# ex : {'/logs/.*': {'msg_queue_size': 100, 'overflow': 'drop_oldest'}}
+# ex : {'/diagnostics': {'history_size': 1000, 'history_age': 10.0}}
+# ex : {'/camera/.*': {'buff_size': 2 ** 24, 'tcp_nodelay': True}}
+# max_wait caps the time a client can block this node waiting for a message, in seconds (default 0.2).
+# The node serves nothing else meanwhile, so keep it short : clients poll again on timeout.
+# ex : {'/robot/status': {'max_wait': 0.5}}
+PUBLISHERS_OPTIONS = {}
+# ex : {'/camera/.*': {'binary': True}}
+# ex : {'/robot/cmd_vel': {'max_rate': 20}}
+# ex : {'/robot/config': {'latch': True, 'queue_size': 10}}
+# async_queue_size publishes from a background thread, so a slow subscriber does not stall pyros.
+# ex : {'/robot/.*': {'async_queue_size': 100, 'async_overflow': 'drop_oldest'}}
+# reuse_msgs reuses message instances once published, for high rate topics.
+# ex : {'/robot/cmd_vel': {'reuse_msgs': True}}
+SUBSCRIBERS_OPTIONS = {}
+
 ROS_USE_CONNECTION_CACHE = False
 ROS_CONNECTION_CACHE_LIST_TOPIC = "/rocon/connection_cache/list"
 ROS_CONNECTION_CACHE_DIFF_TOPIC = "/rocon/connection_cache/diff"
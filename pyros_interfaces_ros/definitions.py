@@ -2,6 +2,7 @@ from __future__ import absolute_import
 
 from . import deffile
 from .util import type_str, load_type
+from .type_cache import get_type_cache
 
 def get_all_msg_types(msg, skip_this=False, type_set=None):
     if type_set is None:
@@ -17,6 +18,27 @@ def get_all_msg_types(msg, skip_this=False, type_set=None):
     return type_set
 
 
+def get_all_msg_fields(msg_type_name, skip_this=False, fields=None, md5sum=None):
+    """
+    Gathers the fields of a message type and of all its nested types.
+    The type descriptors cached on disk are used if possible, to avoid importing message modules.
+    :param md5sum: the md5sum of the message type. None loads the type, since no cached descriptor can be trusted.
+    :return: a dict {type name: [(field name, field type), ...]}
+    """
+    if fields is None:
+        fields = {}
+    desc = None if md5sum is None else get_type_cache().get(msg_type_name, md5sum)
+    if desc is None:
+        for msg_type in get_all_msg_types(load_type(msg_type_name), skip_this=skip_this):
+            fields[type_str(msg_type)] = zip(msg_type.__slots__, msg_type._slot_types)
+    else:
+        if not skip_this:
+            fields[msg_type_name] = zip(desc['slots'], desc['slot_types'])
+        for dep_name, dep in desc['deps'].items():
+            fields[dep_name] = zip(dep['slots'], dep['slot_types'])
+    return fields
+
+
 def get_msg_definitions(msg, skip_this=False):
     type_set = get_all_msg_types(msg, skip_this=skip_this)
 
@@ -40,18 +62,20 @@ def get_definitions(services=None, topics=None, actions=None):
     action_dfns = []
     msg_dfns = []
 
-    type_set = set()
+    msg_fields = {}
     for service in services:
         dfn = deffile.ROSStyleDefinition('srv', service.get('rostype_name'), ['request', 'response'])
-        service_type = load_type(service.get('rostype_name'))
         for field_name, field_type in service.get('srvtype',[None, None])[0].iteritems():
             dfn.segment(0).append((field_name, field_type))
-            type_set = get_all_msg_types(service_type._request_class, skip_this=True, type_set=type_set)
         for field_name, field_type in service.get('srvtype',[None, None])[1].iteritems():
             dfn.segment(1).append((field_name, field_type))
-            type_set = get_all_msg_types(service_type._response_class, skip_this=True, type_set=type_set)
+        msg_fields = get_all_msg_fields(service.get('rostype_name') + 'Request', skip_this=True, fields=msg_fields,
+                                        md5sum=service.get('rostype_req_md5sum'))
+        msg_fields = get_all_msg_fields(service.get('rostype_name') + 'Response', skip_this=True, fields=msg_fields,
+                                        md5sum=service.get('rostype_resp_md5sum'))
         service_dfns.append(dfn)
 
+    type_set = set()
     for action in actions:
         dfn = deffile.ROSStyleDefinition('action', action.rostype_name, ['goal', 'result', 'feedback'])
         for field_name, field_type in zip(action.rostype_goal.__slots__, action.rostype_goal._slot_types):
@@ -64,14 +88,15 @@ def get_definitions(services=None, topics=None, actions=None):
             dfn.segment(2).append((field_name, field_type))
             type_set = get_all_msg_types(action.rostype_feedback, skip_this=True, type_set=type_set)
         action_dfns.append(dfn)
+    for msg_type in type_set:
+        msg_fields[type_str(msg_type)] = zip(msg_type.__slots__, msg_type._slot_types)
 
     for topic in topics:
-        topic_type = load_type(topic.get('rostype_name'))
-        type_set = get_all_msg_types(topic_type, type_set=type_set)
+        msg_fields = get_all_msg_fields(topic.get('rostype_name'), fields=msg_fields, md5sum=topic.get('rostype_md5sum'))
 
-    for msg_type in type_set:
-        dfn = deffile.ROSStyleDefinition('msg', type_str(msg_type), ['msg'])
-        for field_name, field_type in zip(msg_type.__slots__, msg_type._slot_types):
+    for msg_type_name, fields in msg_fields.iteritems():
+        dfn = deffile.ROSStyleDefinition('msg', msg_type_name, ['msg'])
+        for field_name, field_type in fields:
             dfn.segment(0).append((field_name, field_type))
         msg_dfns.append(dfn)
 
@@ -37,10 +37,18 @@ from .api import rospy_safe as rospy
 
 from pyros_common.exceptions import PyrosException
 
+import copy
+from collections import OrderedDict
 import re
 import string
+from threading import Lock
 from base64 import standard_b64encode, standard_b64decode
 
+try:
+    import numpy as _numpy
+except ImportError:  # numpy is needed only for the numpy array mode
+    _numpy = None
+
 # Utils function to get message type from ros or its dict representation
 #outputs message structure as string (useful ?)
 def get_msg(msg):
@@ -94,6 +102,18 @@ class NonexistentFieldException(PyrosException):
         return "Message type {0!s} does not have a field {1!s}".format(self.basetype, '.'.join(self.fields))
 
 
+class MD5SumMismatchException(PyrosException):
+    def __init__(self, rostype, expected_md5sum, found_md5sum):
+        self.rostype = rostype
+        self.expected_md5sum = expected_md5sum
+        self.found_md5sum = found_md5sum
+        super(MD5SumMismatchException, self).__init__(rostype, expected_md5sum, found_md5sum)
+
+    @property
+    def message(self):
+        return "Serialized data for type {0!s} has md5sum {1!s}, but {2!s} is expected".format(self.rostype, self.found_md5sum, self.expected_md5sum)
+
+
 class FieldTypeMismatchException(PyrosException):
     def __init__(self, roottype, fields, expected_type, found_type):
         self.roottype = roottype
@@ -115,90 +135,288 @@ class FieldTypeMismatchException(PyrosException):
 
 ### This is a JSON -> ROS conversion module
 
-def extract_values(inst):
+def _get_mode(numpy=False, binary=False):
+    """ Returns the conversion mode for these options.
+    Converters are compiled and cached separately for each mode. """
+    if numpy and _numpy is None:
+        raise ImportError("numpy is required for the numpy array mode")
+    return frozenset(flag for flag, enabled in (("numpy", numpy), ("binary", binary)) if enabled)
+
+_default_mode = frozenset()
+
+def extract_values(inst, numpy=False, binary=False, fields=None):
+    """ Returns the values of a message instance, as a dict.
+    :param numpy: if True, numeric arrays are returned as numpy arrays, viewing the message data when possible
+    :param binary: if True, uint8[] and char[] are returned as raw bytes, instead of base64 strings
+    :param fields: if not None, the paths of the only fields to extract, like ["pose.pose.position", "header.stamp"].
+    The dict returned keeps the message structure, with only these fields in it. """
     rostype = getattr(inst, "_type", None)
     if rostype is None:
-        raise InvalidMessageException()
-    return _from_inst(inst, rostype)
+        raise InvalidMessageException(inst)
+    return _get_encoder(type(inst), _get_mode(numpy, binary), fields)(inst)
 dump = extract_values
 
-def populate_instance(msg, inst):
+def extract_values_list(insts, numpy=False, binary=False, fields=None):
+    """ Returns the values of a list of instances of the same message class.
+    The converter is looked up only once for the whole list """
+    if not insts:
+        return []
+    if getattr(insts[0], "_type", None) is None:
+        raise InvalidMessageException(insts[0])
+    encoder = _get_encoder(type(insts[0]), _get_mode(numpy, binary), fields)
+    return [encoder(inst) for inst in insts]
+
+def populate_instance(msg, inst, numpy=False, binary=False, reset=False):
     """ Returns an instance of the provided class, with its fields populated
-    according to the values in msg """
+    according to the values in msg
+    :param numpy: if True, numpy arrays are accepted for numeric arrays, without checking each element
+    :param binary: if True, strings and buffers for uint8[] and char[] are raw bytes, not base64 encoded
+    :param reset: if True, all fields are reset to their default value first, reusing nested instances.
+    This way an instance used for a previous message can be populated again (see MsgPool) """
     # if we need to populate an Empty message, we return it already
-    return inst if inst is None else _to_inst(msg, inst._type, inst._type, inst)
+    if inst is None:
+        return inst
+    if reset:
+        _reset_instance(inst)
+    return _to_inst(msg, inst._type, inst._type, inst, mode=_get_mode(numpy, binary))
 #load = populate_instance
 
-def _from_inst(inst, rostype):
-    # Special case for uint8[], we base64 encode the string
+
+# Converters are compiled only once, per field rostype or per message class, and cached here.
+# This way we do not have to walk the slots and compare type strings for every message we convert.
+_field_encoders = {}
+_field_decoders = {}
+_msg_encoders = {}
+_msg_decoders = {}
+# projections are chosen by the clients : only the ones used recently are kept
+_projection_encoders = OrderedDict()
+_projection_encoders_max = 128
+_converters_lock = Lock()
+
+
+def _get_encoder(msg_class, mode, fields):
+    """ Returns the encoder for the whole message, or for the selected fields only """
+    if fields is None:
+        return _get_msg_encoder(msg_class, mode)
+    return _get_projection_encoder(msg_class, mode, fields)
+
+
+def _from_inst(inst, rostype, mode=_default_mode):
+    return _get_field_encoder(rostype, mode)(inst)
+
+
+def _get_field_encoder(rostype, mode=_default_mode):
+    """ Returns the function converting a ROS field value of type rostype to its python representation.
+    The function is compiled the first time and cached afterwards."""
+    encoder = _get_from_cache(_field_encoders, _converters_lock, (rostype, mode))
+    if encoder is None:
+        encoder = _compile_field_encoder(rostype, mode)
+        _add_to_cache(_field_encoders, _converters_lock, (rostype, mode), encoder)
+    return encoder
+
+
+def _compile_field_encoder(rostype, mode):
+    # numeric arrays (binary ones included) become numpy arrays
+    if "numpy" in mode and _numpy_dtype(rostype) is not None:
+        return _compile_numpy_encoder(rostype)
+
+    # Special case for uint8[], we base64 encode the string, unless raw bytes are wanted
     if rostype in ros_binary_types:
-        return standard_b64encode(inst)
+        return _from_primitive_inst if "binary" in mode else standard_b64encode
 
     # Check for time or duration
     if rostype in ros_time_types:
-        return {"secs": inst.secs, "nsecs": inst.nsecs}
+        return _from_time_inst
 
     # Check for primitive types
     if rostype in ros_primitive_types:
-        return inst
+        return _from_primitive_inst
 
     # Check if it's a list or tuple
-    if type(inst) in list_types:
-        return _from_list_inst(inst, rostype)
+    if list_braces.search(rostype):
+        return _compile_list_encoder(rostype, mode)
 
     # Assume it's otherwise a full ros msg object
-    return _from_object_inst(inst, rostype)
+    def _from_object_inst(inst):
+        return _get_msg_encoder(type(inst), mode)(inst)
+    return _from_object_inst
 
 
-def _from_list_inst(inst, rostype):
-    # Can duck out early if the list is empty
-    if not inst:
-        return []
+def _from_time_inst(inst):
+    return {"secs": inst.secs, "nsecs": inst.nsecs}
+
+
+def _from_primitive_inst(inst):
+    return inst
 
+
+def _compile_list_encoder(rostype, mode):
     # Remove the list indicators from the rostype
     rostype = list_braces.sub("", rostype)
-    
+
     # Shortcut for primitives
     if rostype in ros_primitive_types:
-        return list(inst)
+        return list
+
+    item_encoder = _get_field_encoder(rostype, mode)
+
+    def _from_list_inst(inst):
+        # Call the item encoder for every element of the list
+        return [item_encoder(x) for x in inst]
+    return _from_list_inst
+
+
+def _get_msg_encoder(msg_class, mode=_default_mode):
+    """ Returns the function converting a ROS message instance of msg_class to a dict.
+    The function is compiled the first time and cached afterwards."""
+    encoder = _get_from_cache(_msg_encoders, _converters_lock, (msg_class, mode))
+    if encoder is None:
+        encoder = _compile_msg_encoder(msg_class, mode)
+        _add_to_cache(_msg_encoders, _converters_lock, (msg_class, mode), encoder)
+    return encoder
+
+
+def _compile_msg_encoder(msg_class, mode):
+    fields = []
+    for field_name, field_rostype in zip(msg_class.__slots__, msg_class._slot_types):
+        field_encoder = _get_field_encoder(field_rostype, mode)
+        # primitive values are used as they are, we can skip the call
+        fields.append((field_name, None if field_encoder is _from_primitive_inst else field_encoder))
+    fields = tuple(fields)
+
+    def _from_msg_inst(inst):
+        # Create an empty dict then populate with values from the inst
+        msg = {}
+        for field_name, field_encoder in fields:
+            field_inst = getattr(inst, field_name)
+            msg[field_name] = field_inst if field_encoder is None else field_encoder(field_inst)
+        return msg
+    return _from_msg_inst
+
+
+def _get_projection_encoder(msg_class, mode, fields):
+    """ Returns the function converting only some fields of a ROS message instance of msg_class to a dict.
+    The function is compiled the first time for these fields and cached afterwards,
+    as long as it is one of the _projection_encoders_max projections used last."""
+    if isinstance(fields, basestring):
+        fields = [fields]
+    key = (msg_class, mode, tuple(sorted(set(fields))))
+    with _converters_lock:
+        encoder = _projection_encoders.pop(key, None)
+        if encoder is not None:  # moving it to the most recently used end
+            _projection_encoders[key] = encoder
+    if encoder is None:
+        # building the tree of selected fields. None means the whole field is selected.
+        tree = {}
+        for path in key[2]:
+            node = tree
+            names = path.split(".")
+            for name in names[:-1]:
+                if name in node and node[name] is None:  # parent already selected as a whole
+                    break
+                node = node.setdefault(name, {})
+            else:
+                node[names[-1]] = None
+        encoder = _compile_projection_encoder(msg_class._type, msg_class._type, tree, mode, [], msg_class)
+        with _converters_lock:
+            _projection_encoders[key] = encoder
+            while len(_projection_encoders) > _projection_encoders_max:
+                _projection_encoders.popitem(last=False)
+    return encoder
+
+
+def _compile_projection_encoder(rostype, roottype, tree, mode, stack, msg_class=None):
+    # the root class is given : srv requests and responses, or generated classes, cannot be found by name
+    if msg_class is not None:
+        slot_types = dict(zip(msg_class.__slots__, msg_class._slot_types))
+    # Check for time or duration, they have fields too
+    elif rostype in ros_time_types:
+        slot_types = {"secs": "int32", "nsecs": "int32"}
+    # Check if it's a list : we project every item
+    elif list_braces.search(rostype):
+        item_encoder = _compile_projection_encoder(list_braces.sub("", rostype), roottype, tree, mode, stack)
+
+        def _from_projected_list_inst(inst):
+            return [item_encoder(x) for x in inst]
+        return _from_projected_list_inst
+    elif rostype in ros_primitive_types:
+        raise NonexistentFieldException(roottype, stack + [sorted(tree)[0]])
+    else:
+        msg_class = _get_msg_class(rostype)
+        slot_types = dict(zip(msg_class.__slots__, msg_class._slot_types))
+
+    fields = []
+    for field_name, subtree in sorted(tree.items()):
+        field_rostype = slot_types.get(field_name)
+        if field_rostype is None:
+            raise NonexistentFieldException(roottype, stack + [field_name])
+        if subtree is None:
+            fields.append((field_name, _get_field_encoder(field_rostype, mode)))
+        else:
+            fields.append((field_name, _compile_projection_encoder(field_rostype, roottype, subtree, mode, stack + [field_name])))
+    fields = tuple(fields)
+
+    def _from_projected_inst(inst):
+        # only the selected fields are read, the others are not converted at all
+        msg = {}
+        for field_name, field_encoder in fields:
+            msg[field_name] = field_encoder(getattr(inst, field_name))
+        return msg
+    return _from_projected_inst
+
+
+def _to_inst(msg, rostype, roottype, inst=None, stack=None, mode=_default_mode):
+    if stack is None:
+        stack = []
+    return _get_field_decoder(rostype, mode)(msg, roottype, inst, stack)
 
-    # Call to _to_inst for every element of the list
-    return [_from_inst(x, rostype) for x in inst]
 
+def _get_field_decoder(rostype, mode=_default_mode):
+    """ Returns the function converting a python value to a ROS field value of type rostype.
+    The function is compiled the first time and cached afterwards."""
+    decoder = _get_from_cache(_field_decoders, _converters_lock, (rostype, mode))
+    if decoder is None:
+        decoder = _compile_field_decoder(rostype, mode)
+        _add_to_cache(_field_decoders, _converters_lock, (rostype, mode), decoder)
+    return decoder
 
-def _from_object_inst(inst, rostype):
-    # Create an empty dict then populate with values from the inst
-    msg = {}
-    for field_name, field_rostype in zip(inst.__slots__, inst._slot_types):
-        field_inst = getattr(inst, field_name)
-        msg[field_name] = _from_inst(field_inst, field_rostype)
-    return msg
 
+def _compile_field_decoder(rostype, mode):
+    # numpy arrays are accepted as they are for numeric arrays, other values are decoded with the other options
+    if "numpy" in mode and _numpy_dtype(rostype) is not None:
+        return _compile_numpy_decoder(rostype, _get_field_decoder(rostype, mode - frozenset(["numpy"])))
 
-def _to_inst(msg, rostype, roottype, inst=None, stack=None):
     # Check if it's uint8[], and if it's a string, try to b64decode
-    if stack is None:
-        stack = []
     if rostype in ros_binary_types:
-        return _to_binary_inst(msg)
+        if "binary" in mode:
+            def _to_raw_binary_field_inst(msg, roottype, inst, stack):
+                return _to_raw_binary_inst(msg)
+            return _to_raw_binary_field_inst
+
+        def _to_binary_field_inst(msg, roottype, inst, stack):
+            return _to_binary_inst(msg)
+        return _to_binary_field_inst
 
     # Check the type for time or rostime
     if rostype in ros_time_types:
-        return _to_time_inst(msg, rostype, inst)
+        def _to_time_field_inst(msg, roottype, inst, stack):
+            return _to_time_inst(msg, rostype, inst)
+        return _to_time_field_inst
 
     # Check to see whether this is a primitive type
     if rostype in ros_primitive_types:
-        return _to_primitive_inst(msg, rostype, roottype, stack)
+        return _compile_primitive_decoder(rostype)
 
     # Check whether we're dealing with a list type
-    if inst is not None and type(inst) in list_types:
-        return _to_list_inst(msg, rostype, roottype, inst, stack)
+    if list_braces.search(rostype):
+        return _compile_list_decoder(rostype, mode)
 
     # Otherwise, the type has to be a full ros msg type, so msg must be a dict
-    if inst is None:
-        inst = _get_msg_class(rostype)()
-
-    return _to_object_inst(msg, rostype, roottype, inst, stack)
+    def _to_object_field_inst(msg, roottype, inst, stack):
+        if inst is None:
+            inst = _get_msg_class(rostype)()
+        return _to_object_inst(msg, rostype, roottype, inst, stack, mode)
+    return _to_object_field_inst
 
 
 def _to_binary_inst(msg):
@@ -214,6 +432,17 @@ def _to_binary_inst(msg):
             return msg
 
 
+def _to_raw_binary_inst(msg):
+    # raw bytes are taken as they are, without trying to b64decode
+    if type(msg) is str:
+        return msg
+    elif isinstance(msg, memoryview):
+        return msg.tobytes()
+    elif isinstance(msg, (bytearray, buffer)):
+        return str(msg)
+    return _to_binary_inst(msg)
+
+
 def _to_time_inst(msg, rostype, inst=None):
     # Create an instance if we haven't been provided with one
     if rostype == "time" and msg == "now":
@@ -238,33 +467,51 @@ def _to_time_inst(msg, rostype, inst=None):
     return inst
 
 
-def _to_primitive_inst(msg, rostype, roottype, stack):
-    # Typecheck the msg
-    msgtype = type(msg)
-    if msgtype in primitive_types and rostype in type_map[msgtype.__name__]:
-        return msg
-    elif msgtype in string_types and rostype in type_map[msgtype.__name__]:
-        return msg.encode("ascii", "ignore")
-    raise FieldTypeMismatchException(roottype, stack, rostype, msgtype)
-
+def _compile_primitive_decoder(rostype):
+    # The python types accepted for this rostype are determined only once
+    accepted_types = frozenset(t for t in primitive_types if rostype in type_map[t.__name__])
+    accepted_string_types = frozenset(t for t in string_types if rostype in type_map[t.__name__])
 
-def _to_list_inst(msg, rostype, roottype, inst, stack):
-    # Typecheck the msg
-    if type(msg) not in list_types:
-        raise FieldTypeMismatchException(roottype, stack, rostype, type(msg))
+    def _to_primitive_inst(msg, roottype, inst, stack):
+        # Typecheck the msg
+        msgtype = type(msg)
+        if msgtype in accepted_types:
+            return msg
+        elif msgtype in accepted_string_types:
+            return msg.encode("ascii", "ignore")
+        raise FieldTypeMismatchException(roottype, stack, rostype, msgtype)
+    return _to_primitive_inst
 
-    # Can duck out early if the list is empty
-    if len(msg) == 0:
-        return []
 
+def _compile_list_decoder(rostype, mode):
     # Remove the list indicators from the rostype
-    rostype = list_braces.sub("", rostype)
-
-    # Call to _to_inst for every element of the list
-    return [_to_inst(x, rostype, roottype, None, stack) for x in msg]
+    item_rostype = list_braces.sub("", rostype)
+    item_decoder = _get_field_decoder(item_rostype, mode)
+
+    def _to_list_inst(msg, roottype, inst, stack):
+        # Typecheck the msg
+        if type(msg) not in list_types:
+            raise FieldTypeMismatchException(roottype, stack, rostype, type(msg))
+
+        # Call the item decoder for every element of the list
+        return [item_decoder(x, roottype, None, stack) for x in msg]
+    return _to_list_inst
+
+
+def _get_msg_decoder(msg_class, mode=_default_mode):
+    """ Returns the mapping of field names to field decoders for msg_class.
+    The mapping is compiled the first time and cached afterwards."""
+    decoder = _get_from_cache(_msg_decoders, _converters_lock, (msg_class, mode))
+    if decoder is None:
+        decoder = dict(
+            (field_name, _get_field_decoder(field_rostype, mode))
+            for field_name, field_rostype in zip(msg_class.__slots__, msg_class._slot_types)
+        )
+        _add_to_cache(_msg_decoders, _converters_lock, (msg_class, mode), decoder)
+    return decoder
 
 
-def _to_object_inst(msg, rostype, roottype, inst, stack):
+def _to_object_inst(msg, rostype, roottype, inst, stack, mode=_default_mode):
     # Typecheck the msg
     if type(msg) is not dict:
         raise FieldTypeMismatchException(roottype, stack, rostype, type(msg))
@@ -273,27 +520,172 @@ def _to_object_inst(msg, rostype, roottype, inst, stack):
     if rostype in ros_header_types:
         inst.stamp = rospy.get_rostime()
 
-    inst_fields = dict(zip(inst.__slots__, inst._slot_types))
+    field_decoders = _get_msg_decoder(type(inst), mode)
 
     for field_name in msg:
         # Add this field to the field stack
         field_stack = stack + [field_name]
 
         # Raise an exception if the msg contains a bad field
-        if not field_name in inst_fields:
+        field_decoder = field_decoders.get(field_name)
+        if field_decoder is None:
             raise NonexistentFieldException(roottype, field_stack)
 
-        field_rostype = inst_fields[field_name]
-        field_inst = getattr(inst, field_name)
-
-        field_value = _to_inst(msg[field_name], field_rostype,
-                    roottype, field_inst, field_stack)
+        field_value = field_decoder(msg[field_name], roottype, getattr(inst, field_name), field_stack)
 
         setattr(inst, field_name, field_value)
 
     return inst
 
-from threading import Lock
+
+# numpy array mode. ROS serializes numbers in little endian.
+ros_numpy_dtypes = {
+    "bool": "?", "byte": "<i1", "char": "<u1", "int8": "<i1", "uint8": "<u1",
+    "int16": "<i2", "uint16": "<u2", "int32": "<i4", "uint32": "<u4",
+    "int64": "<i8", "uint64": "<u8", "float32": "<f4", "float64": "<f8",
+}
+
+
+def _numpy_dtype(rostype):
+    """ Returns the numpy dtype for an array of numbers, None for any other rostype """
+    if not list_braces.search(rostype):
+        return None
+    dtype = ros_numpy_dtypes.get(list_braces.sub("", rostype))
+    return None if dtype is None else _numpy.dtype(dtype)
+
+
+def _compile_numpy_encoder(rostype):
+    dtype = _numpy_dtype(rostype)
+
+    def _from_numpy_inst(inst):
+        if isinstance(inst, _numpy.ndarray):  # message deserialized by rospy.numpy_msg
+            return inst
+        if isinstance(inst, str):  # binary data is deserialized as a string, we can view it
+            return _numpy.frombuffer(inst, dtype)
+        return _numpy.array(inst, dtype)
+    return _from_numpy_inst
+
+
+def _compile_numpy_decoder(rostype, default_decoder):
+    dtype = _numpy_dtype(rostype)
+    # rospy serializes uint8[] and char[] from a string
+    binary = list_braces.sub("", rostype) in ["uint8", "char"]
+
+    def _to_numpy_inst(msg, roottype, inst, stack):
+        if not isinstance(msg, _numpy.ndarray):
+            return default_decoder(msg, roottype, inst, stack)
+        # the array is taken as a whole, converting it only if it is not of the expected dtype
+        msg = _numpy.asarray(msg, dtype)
+        return msg.tostring() if binary else msg.tolist()
+    return _to_numpy_inst
+
+
+# Message instances reuse : resetting an instance costs less than allocating a new one, with all nested instances.
+_msg_defaults = {}
+_msg_pools = {}
+
+
+def _get_msg_defaults(msg_class):
+    """ Returns the list of (field name, kind, default value) for msg_class.
+    The defaults are taken from an instance built the first time, and cached afterwards."""
+    defaults = _get_from_cache(_msg_defaults, _converters_lock, msg_class)
+    if defaults is None:
+        template = msg_class()
+        defaults = []
+        for field_name, field_rostype in zip(msg_class.__slots__, msg_class._slot_types):
+            if field_rostype in ros_time_types:
+                kind = "time"
+            elif list_braces.search(field_rostype):
+                kind = "array"
+            elif field_rostype in ros_primitive_types:
+                kind = "primitive"
+            else:
+                kind = "object"
+            defaults.append((field_name, kind, getattr(template, field_name)))
+        _add_to_cache(_msg_defaults, _converters_lock, msg_class, defaults)
+    return defaults
+
+
+def _reset_instance(inst):
+    for field_name, kind, default in _get_msg_defaults(type(inst)):
+        if kind == "primitive":  # immutable
+            setattr(inst, field_name, default)
+            continue
+        current = getattr(inst, field_name)
+        if current is None:
+            setattr(inst, field_name, copy.deepcopy(default))
+        elif kind == "object":
+            _reset_instance(current)
+        elif kind == "time":
+            current.secs, current.nsecs = default.secs, default.nsecs
+        else:  # arrays are replaced by the decoders anyway
+            setattr(inst, field_name, copy.deepcopy(default))
+
+
+class MsgPool(object):
+    """ A pool of instances of one message class, to reuse them instead of allocating one per message.
+    Instances taken from the pool must be populated with reset=True, and put back only once nothing refers to them anymore
+    (rospy serializes a message when publishing it, or calling a service with it, unless the topic is latched). """
+
+    def __init__(self, msg_class, max_size=8):
+        self.msg_class = msg_class
+        self.max_size = max_size
+        self._free = []
+
+    def get(self):
+        try:
+            return self._free.pop()  # atomic
+        except IndexError:
+            return self.msg_class()
+
+    def put(self, inst):
+        if len(self._free) < self.max_size:
+            self._free.append(inst)
+
+
+def get_msg_pool(msg_class):
+    """ Returns the instance pool for msg_class, shared in this process """
+    pool = _get_from_cache(_msg_pools, _converters_lock, msg_class)
+    if pool is None:
+        pool = MsgPool(msg_class)
+        _add_to_cache(_msg_pools, _converters_lock, msg_class, pool)
+    return pool
+
+
+# Serialized passthrough : classes sending and receiving the ROS serialized data as it is.
+_serialized_classes = {}
+
+
+def get_serialized_class(msg_class):
+    """ Returns a class with the same type and md5sum as msg_class, but which instances only hold serialized data.
+    rospy accepts it to publish on a msg_class topic, or to call a service with a msg_class request,
+    and deserializing a msg_class message into it just keeps the data (in _buff). """
+    cls = _get_from_cache(_serialized_classes, _converters_lock, msg_class)
+    if cls is None:
+        cls = type(msg_class.__name__ + 'Serialized', (rospy.AnyMsg,), {
+            '__slots__': [],
+            '_type': msg_class._type,
+            '_md5sum': msg_class._md5sum,
+        })
+        _add_to_cache(_serialized_classes, _converters_lock, msg_class, cls)
+    return cls
+
+
+def get_serialized_srv_class(srv_class):
+    """ Returns a service class with the same type and md5sum as srv_class,
+    but with serialized request and response classes (see get_serialized_class) """
+    cls = _get_from_cache(_serialized_classes, _converters_lock, srv_class)
+    if cls is None:
+        cls = type(srv_class.__name__ + 'Serialized', (object,), {
+            '_type': srv_class._type,
+            '_md5sum': srv_class._md5sum,
+            '_request_class': get_serialized_class(srv_class._request_class),
+            '_response_class': get_serialized_class(srv_class._response_class),
+        })
+        _add_to_cache(_serialized_classes, _converters_lock, srv_class, cls)
+    return cls
+
+
 # Variable containing the loaded classes
 _loaded_msgs = {}
 _loaded_srvs = {}
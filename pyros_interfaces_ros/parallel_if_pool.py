@@ -0,0 +1,84 @@
+from __future__ import absolute_import
+
+import logging
+from multiprocessing.pool import ThreadPool
+
+# create logger
+_logger = logging.getLogger(__name__)
+# and let it propagate to parent logger, or other handler
+# the user of pyros should configure handlers
+
+from pyros_interfaces_common.transient_if_pool import TransientIfPool, DiffTuple
+
+
+class ParallelTransientIfPool(TransientIfPool):
+
+    """
+    TransientIfPool that can build its transients in parallel, with a bounded pool of worker threads.
+    Building a ROS transient means loading manifests, importing modules and calling the master,
+    so a big change in the system is much faster to apply this way.
+
+    In parallel mode, a transient that fails to build does not abort the others.
+    The failures are logged and kept in last_errors, until the next update.
+    """
+    def __init__(self, transients=None, transients_desc=None, max_workers=None):
+        # needs to be set before the base constructor, which already updates transients
+        #: number of worker threads. None means transients are built one after the other.
+        self.max_workers = max_workers
+        self._workers = None
+        #: transient name -> exception, for the transients that failed during the last update
+        self.last_errors = {}
+        super(ParallelTransientIfPool, self).__init__(transients, transients_desc=transients_desc)
+
+    def _build_transient(self, tst_name, class_build_args, class_build_kwargs):
+        """
+        Builds one transient, catching exceptions to report them later.
+        :return: a tuple (name, transient or None, exception or None)
+        """
+        try:
+            ttype = self.transient_type_resolver(tst_name)
+            if ttype is None:  # transient cannot be resolved
+                _logger.warning("[{name}] Type of {desc} {transient} unknown. Giving up trying to interface.".format(
+                    name=__name__, desc=self.transients_desc, transient=tst_name))
+                return tst_name, None, None
+            return tst_name, self.TransientMaker(tst_name, ttype, *class_build_args, **class_build_kwargs), None
+        except Exception as e:
+            return tst_name, None, e
+
+    def update_transients(self, add_names, remove_names, *class_build_args, **class_build_kwargs):
+        """
+        Same as TransientIfPool.update_transients, but building transients in parallel if max_workers is set.
+        """
+        if not self.max_workers:
+            return super(ParallelTransientIfPool, self).update_transients(add_names, remove_names, *class_build_args, **class_build_kwargs)
+
+        if self._workers is None:
+            self._workers = ThreadPool(self.max_workers)
+
+        self.last_errors = {}
+        added = []
+        to_add = [tst for tst in add_names if tst not in self.transients]
+        for tst_name, tst, exc in self._workers.map(
+            lambda n: self._build_transient(n, class_build_args, class_build_kwargs), to_add
+        ):
+            if tst is not None:
+                self.transients[tst_name] = tst
+                added.append(tst_name)
+                _logger.info("[{name}] Interfacing with {desc} {transient}".format(name=__name__, desc=self.transients_desc, transient=tst_name))
+            elif exc is not None:
+                self.last_errors[tst_name] = exc
+                _logger.warning("[{name}] Cannot interface with {desc} {transient} : {exc}".format(name=__name__, desc=self.transients_desc, transient=tst_name, exc=exc))
+
+        # removing is fast, no need to do it in parallel
+        dt = super(ParallelTransientIfPool, self).update_transients([], remove_names, *class_build_args, **class_build_kwargs)
+
+        return DiffTuple(added, dt.removed)
+
+    def stop(self):
+        """
+        Stops the worker threads, if any. They are started again on the next parallel update.
+        """
+        if self._workers is not None:
+            self._workers.close()
+            self._workers.join()
+            self._workers = None
@@ -0,0 +1,193 @@
+from __future__ import absolute_import
+
+import logging
+import threading
+
+from .api import rospy_safe as rospy
+
+try:
+    # rospy internal param cache. rospy updates it when the master notifies a param change.
+    from rospy.impl.paramserver import get_param_server_cache
+except ImportError:
+    get_param_server_cache = None
+
+# create logger
+_logger = logging.getLogger(__name__)
+# and let it propagate to parent logger, or other handler
+# the user of pyros should configure handlers
+
+
+def _split_key(key):
+    return [k for k in key.split('/') if k]
+
+
+def _tree_set(tree, path, value):
+    """
+    Sets the value at path in the tree, creating intermediate dicts if needed.
+    An empty dict value means the param has been deleted (this is what the master notifies).
+    :return: the modified tree
+    """
+    if not path:
+        return value
+    if not isinstance(tree, dict):
+        tree = {}
+    subtree = _tree_set(tree.get(path[0]), path[1:], value)
+    if subtree == {}:
+        tree.pop(path[0], None)
+    else:
+        tree[path[0]] = subtree
+    return tree
+
+
+class ParamCache(object):
+    """
+    ParamCache is a local copy of a param server subtree.
+    It subscribes to the subtree on the master, and applies the change notifications it receives,
+    so that reading the subtree does not need any call to the master.
+
+    If the subscription is not possible, the subtree is retrieved from the master on every access.
+
+    The tree returned is shared, and should not be modified by the caller.
+    Use set() and delete() to reflect local changes immediately, without waiting for the notification.
+    """
+
+    # all caches in this process, by namespace, to dispatch notifications to them
+    _caches = {}
+    _caches_lock = threading.Lock()
+    _hooked = False
+
+    def __init__(self, namespace):
+        self.namespace = '/' + '/'.join(_split_key(namespace))
+        self._lock = threading.RLock()
+        self._tree = None
+        # number of users, from get_param_cache(), the subscription is kept as long as one remains
+        self._users = 0
+        #: incremented on every change, so users can cache what they compute from the tree
+        self.version = 0
+
+    @property
+    def subscribed(self):
+        return self._tree is not None
+
+    @classmethod
+    def _hook_notifications(cls):
+        """
+        Intercepts rospy param updates to dispatch the ones we subscribed to.
+        rospy only updates keys that it has cached itself, which does not work for subtrees.
+        :return: True if notifications can be received
+        """
+        with cls._caches_lock:
+            if not cls._hooked and get_param_server_cache is not None:
+                rospy_cache = get_param_server_cache()
+                rospy_update = rospy_cache.update
+
+                def update(key, value):
+                    handled = cls._dispatch(key, value)
+                    try:
+                        rospy_update(key, value)
+                    except KeyError:
+                        if not handled:  # rospy will answer "not subscribed" to the master
+                            raise
+
+                rospy_cache.update = update
+                cls._hooked = True
+        return cls._hooked
+
+    @classmethod
+    def _dispatch(cls, key, value):
+        with cls._caches_lock:
+            caches = list(cls._caches.values())
+        handled = False
+        for cache in caches:
+            handled = cache._apply(key, value) or handled
+        return handled
+
+    def _apply(self, key, value):
+        """
+        Applies a change notification to the local tree.
+        :return: True if the key concerns this cache
+        """
+        path = _split_key(key)
+        ns = _split_key(self.namespace)
+        with self._lock:
+            if path[:len(ns)] == ns:  # change inside our subtree
+                if self._tree is not None:
+                    self._tree = _tree_set(self._tree, path[len(ns):], value)
+                    self.version += 1
+                return True
+            elif ns[:len(path)] == path:  # change of a parent of our subtree
+                for k in ns[len(path):]:
+                    value = value.get(k, {}) if isinstance(value, dict) else {}
+                if self._tree is not None:
+                    self._tree = value
+                    self.version += 1
+                return True
+        return False
+
+    def _subscribe(self):
+        """
+        Subscribes to the subtree on the master.
+        :return: the current value of the subtree, or None if the subscription failed
+        """
+        if not ParamCache._hook_notifications():
+            return None
+        code, msg, value = rospy.get_master().subscribeParam(rospy.get_node_uri(), self.namespace)
+        if code != 1:
+            rospy.logwarn("Pyros.ros : cannot subscribe to param {ns} : {msg}. Param cache disabled.".format(ns=self.namespace, msg=msg))
+            return None
+        return value
+
+    def get(self):
+        """
+        Returns the subtree. The master is called only the first time, when subscribing.
+        """
+        with self._lock:
+            if self._tree is None:
+                tree = self._subscribe()
+                if tree is None:
+                    # no notifications : we cannot keep a copy
+                    return rospy.get_param(self.namespace, {})
+                self._tree = tree
+            return self._tree
+
+    def set(self, key, value):
+        """
+        Reflects a change we did ourselves on the param server.
+        """
+        self._apply(key, value)
+
+    def delete(self, key):
+        """
+        Reflects a deletion we did ourselves on the param server.
+        """
+        self._apply(key, {})
+
+    def close(self):
+        """
+        Releases the cache. The last user unsubscribes it from the master.
+        The cache will subscribe again on the next get().
+        """
+        with ParamCache._caches_lock:
+            if self._users > 0:
+                self._users -= 1
+            if self._users > 0:
+                return
+        with self._lock:
+            if self._tree is not None:
+                self._tree = None
+                rospy.get_master().unsubscribeParam(rospy.get_node_uri(), self.namespace)
+
+
+def get_param_cache(namespace):
+    """
+    Returns the param cache for this namespace, shared in this process.
+    Each call must be matched by a call to close() on the cache, once the caller does not need it anymore.
+    """
+    namespace = '/' + '/'.join(_split_key(namespace))
+    with ParamCache._caches_lock:
+        cache = ParamCache._caches.get(namespace)
+        if cache is None:
+            cache = ParamCache(namespace)
+            ParamCache._caches[namespace] = cache
+        cache._users += 1
+    return cache
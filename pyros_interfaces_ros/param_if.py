@@ -1,11 +1,14 @@
 from __future__ import absolute_import
 from __future__ import print_function
 
+import copy
 from collections import OrderedDict
 
 from .api import rospy_safe as rospy
 from pyros_interfaces_common.transient_if import TransientIf
 
+from .param_cache import get_param_cache
+
 
 class ParamTuple(object):
     def __init__(self, name, type):
@@ -24,9 +27,11 @@ class ParamBack(TransientIf):
         # defining a type on param to unify API for topic, services and param.
         super(ParamBack, self).__init__(param_name, param_type)
 
-        # TODO : should we here manage how to get param values with rospy (same as for service and topic ?)
+        # local copy of the param value, updated by the master when it changes
+        self.cache = get_param_cache(param_name)
 
     def cleanup(self):
+        self.cache.close()
         super(ParamBack, self).cleanup()
 
     def asdict(self):
@@ -46,8 +51,14 @@ class ParamBack(TransientIf):
     def setval(self, val):
         # TODO : think about stricter type checking...
         rospy.set_param(self.name, val)
+        # no need to wait for the master notification
+        self.cache.set(self.name, val)
         return
 
     def getval(self):
-        res = rospy.get_param(self.name)
-        return res
+        res = self.cache.get()
+        # the master notifies a deleted param as an empty dict
+        if res == {}:
+            raise KeyError(self.name)
+        # the cached value is shared, the caller should not be able to modify it
+        return copy.deepcopy(res)
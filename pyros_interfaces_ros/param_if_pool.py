@@ -2,6 +2,7 @@ from __future__ import absolute_import
 from __future__ import print_function
 
 import logging
+import time
 
 from .api import rospy_safe as rospy
 
@@ -20,10 +21,27 @@ class RosParamIfPool(TransientIfPool):
     """
     MockInterface.
     """
-    def __init__(self, params=None):
+    def __init__(self, params=None, names_update_period=None):
+        #: period (in seconds) of the param names retrieval from the master.
+        #: None retrieves them on every update. Values of interfaced params are kept up to date by the param cache anyway.
+        self.names_update_period = names_update_period
+        self._names = None
+        self._last_names_update = None
         # This base constructor assumes the system to interface with is already available ( can do a get_svc_available() )
         super(RosParamIfPool, self).__init__(params, transients_desc="parameters")
 
+    def get_param_names(self, force=False):
+        """
+        Returns the names of the params on the param server.
+        The master is called only if names_update_period has elapsed since the last call.
+        :param force: whether to call the master anyway
+        """
+        now = time.time()
+        if force or self._names is None or self.names_update_period is None or now - self._last_names_update >= self.names_update_period:
+            self._names = set(rospy.get_param_names())
+            self._last_names_update = now
+        return self._names
+
     # mockinterface functions that simulate/mockinterface similar interface than what is found on multiprocess framework supported
     # We should try our best to go for the lowest common denominator here
     # PARAMS
@@ -88,7 +106,7 @@ class RosParamIfPool(TransientIfPool):
         called to update params from rospy.
         CAREFUL : this can be called from another thread (subscriber callback)
         """
-        params = rospy.get_param_names()
+        params = self.get_param_names()
         self.reset_state(params)
 
     def reset_state(self, params):
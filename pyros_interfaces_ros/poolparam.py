@@ -1,11 +1,13 @@
 from __future__ import absolute_import
 
+import threading
 from collections import Counter
 
 from .api import rosnode_safe as rosnode
 
 from .api import rospy_safe as rospy
 from .message_conversion import get_msg, get_msg_dict
+from .param_cache import get_param_cache
 
 
 def get_topic_msg(topic):
@@ -41,17 +43,33 @@ class PoolParam(object):
     def param_namespace(self):
         return '/pyros' + rospy.get_name() + '/' + self.topic_descr
 
-    def __init__(self, topic_class, topic_descr):
+    def __init__(self, topic_class, topic_descr, reconcile=None):
         # :topic_class rospy.Publisher or rospy.Subscriber
         self.topic_class = topic_class
         # :topic_descr "publishers" or "subscribers"
         self.topic_descr = topic_descr
+        # :reconcile called as reconcile(impl, **kwargs) when an existing topic is acquired again,
+        # to adapt its implementation to the settings requested.
+        self.reconcile = reconcile
         # ROS didnt start yet we cant write a param.
         # rospy.set_param(self.param_namespace, {})
 
         # setting up the pool for this instance
         self.topics = {}
         self.topics_count = Counter()
+        # protects topics and topics_count, since transients can be built in parallel
+        self._lock = threading.Lock()
+
+        # interfaces map, computed from the param cache, and valid as long as the cache doesnt change
+        self._if_map = None
+        self._if_map_version = None
+        # node api uris, retrieved only once per node
+        self._node_uris = {}
+        # the interfaces of all pyros nodes, shared with the other pools
+        self.pyros_params = get_param_cache('/pyros')
+
+        # callbacks to call when a topic implementation gets a connection
+        self.connection_cbs = {}
 
     def acquire(self, topic_name, topic_type, *args, **kwargs):
         """
@@ -61,41 +79,103 @@ class PoolParam(object):
         """
         # NOTE : the node must be initialized before reaching this
         topic_name = rospy.resolve_name(topic_name)
+        created = False
         if topic_name not in self.topics:
             # Asserting this topic interface is also not registered on ROS param server
             # TODO : fix this. This currently can assert because cleanup is not happening when it should (check for shutting_down argument to update()).
             #assert (not rospy.get_param(self.param_namespace + topic_name, False))
-            # build a new instance only if needed
-            self.topics[topic_name] = self.topic_class(topic_name, topic_type, *args, **kwargs)
+            # build a new instance only if needed.
+            # This can take time (registering with the master), so we do it without holding the lock.
+            tpc = self.topic_class(topic_name, topic_type, *args, **kwargs)
+            with self._lock:
+                created = topic_name not in self.topics
+                if created:
+                    self.topics[topic_name] = tpc
+            if created:
+                self._hook_connections(topic_name, tpc)
 
-            # Advertising ROS system wide, which topic are interfaced with this process
-            #  We need this to be atomic to avoid race conditions
-            rospy.set_param(self.param_namespace + topic_name, True)
+                # Advertising ROS system wide, which topic are interfaced with this process
+                #  We need this to be atomic to avoid race conditions
+                rospy.set_param(self.param_namespace + topic_name, True)
+                self.pyros_params.set(self.param_namespace + topic_name, True)
+            else:
+                # another thread created it in the meantime. rospy shares the implementation, we just drop ours.
+                tpc.unregister()
 
-        # assert topic type (data_class) didn't change in the meantime (ROS doesnt support it anyway)
-        assert (topic_type == self.topics[topic_name].data_class)
-        # We count artificial instances here (rospy uses same socket internally).
-        # this helps using only one publisher in the interface.
-        self.topics_count[topic_name] += 1
-        # but that data has meaning only in this process. other processes will see only one connection.
-        return self.topics[topic_name]
+        with self._lock:
+            # assert topic type (data_class) didn't change in the meantime (ROS doesnt support it anyway)
+            # rospy.AnyMsg (lazy interfaces) can share the implementation with the actual type :
+            # rospy keeps the data_class of the first one, and the interfaces handle both.
+            data_class = self.topics[topic_name].data_class
+            assert (topic_type == data_class or rospy.AnyMsg in (topic_type, data_class))
+            # We count artificial instances here (rospy uses same socket internally).
+            # this helps using only one publisher in the interface.
+            self.topics_count[topic_name] += 1
+            # but that data has meaning only in this process. other processes will see only one connection.
+            tpc = self.topics[topic_name]
+
+        if not created and self.reconcile is not None:
+            self.reconcile(tpc.impl, **kwargs)
+        return tpc
 
     def release(self, tpc):
         """
         Removing a topic and substracting it from the list.
         :return: None
         """
-        if tpc.name in self.topics_count:
+        with self._lock:
+            if tpc.name not in self.topics_count:
+                return
             self.topics_count[tpc.name] -= 1
-            if self.topics_count[tpc.name] == 0:
-                # Advertising ROS system wide, which topic are interfaced with this process
-                #  We need this to be atomic to avoid race conditions
-                rospy.set_param(self.param_namespace + tpc.name, False)
-
+            last = self.topics_count[tpc.name] == 0
+            if last:
                 self.topics.pop(tpc.name)
-                # TODO: keep it around until GC ??
-                # Be aware of https://github.com/ros/ros_comm/issues/111
-                tpc.unregister()
+                self.connection_cbs.pop(tpc.name, None)
+
+        if last:
+            # Advertising ROS system wide, which topic are interfaced with this process
+            #  We need this to be atomic to avoid race conditions
+            rospy.set_param(self.param_namespace + tpc.name, False)
+            self.pyros_params.set(self.param_namespace + tpc.name, False)
+
+            # TODO: keep it around until GC ??
+            # Be aware of https://github.com/ros/ros_comm/issues/111
+            tpc.unregister()
+
+    def _hook_connections(self, topic_name, tpc):
+        """
+        Intercepts new connections on the rospy topic implementation, to notify the connection callbacks.
+        The implementation can be shared with other rospy instances for the same topic, so we hook it only once.
+        """
+        impl = tpc.impl
+        if getattr(impl, '_pyros_add_connection', None) is not None:
+            return
+        impl._pyros_add_connection = impl.add_connection
+
+        def add_connection(c):
+            res = impl._pyros_add_connection(c)
+            for cb in list(self.connection_cbs.get(topic_name, [])):
+                cb()
+            return res
+        impl.add_connection = add_connection
+
+    def add_connection_callback(self, name, cb):
+        """
+        Registers a callback to call when the topic implementation gets a connection.
+        The callback is called immediately if there is a connection already.
+        :param name: name of the topic
+        :param cb: the callback, without arguments
+        """
+        self.connection_cbs.setdefault(name, []).append(cb)
+        if self.get_impl_connections(name):
+            cb()
+
+    def remove_connection_callback(self, name, cb):
+        """
+        Removes a callback registered with add_connection_callback
+        """
+        if cb in self.connection_cbs.get(name, []):
+            self.connection_cbs[name].remove(cb)
 
     def get_impl_ref_count(self, name):
         """
@@ -141,19 +221,33 @@ class PoolParam(object):
             return dict(items)
 
         # Inspect params to find who also interface this publisher
-        # TODO : use hte param internal interface instead of doing a request here...
-        # TODO : or maybe NOT ! The synchronicity of this call is important to know the current state of the interface
-        # TODO : getting it from cache suddenly break this mandatory synchronous access...
-        pyros_if = rospy.get_param('/pyros', {})
+        # The synchronicity of this access is important to know the current state of the interface :
+        # - our own changes are applied to the cache as soon as we do them (acquire / release)
+        # - other pyros nodes changes are applied when the master notifies us.
+        version = self.pyros_params.version  # read first : a change in between will just trigger a rebuild next time
+        pyros_if = self.pyros_params.get()
+        if self.pyros_params.subscribed and self._if_map is not None and self._if_map_version == version:
+            return self._if_map
+
         if_map = {}
         for k, v in pyros_if.iteritems():
             # we need to reconstruct the slashes, lost when storing as params...
-            if_map["/" + k] = {
-                'uri': rosnode.get_api_uri(rospy.get_master(), "/" + k)[2],
+            node = "/" + k
+            if node not in self._node_uris:
+                self._node_uris[node] = rosnode.get_api_uri(rospy.get_master(), node)[2]
+            if_map[node] = {
+                'uri': self._node_uris[node],
                 self.topic_descr: {"/" + tn: tv for tn, tv in flatten_dict(v.get(self.topic_descr, {})).iteritems()}
             }
+        # forgetting nodes that are not there anymore (their uri might change if they come back)
+        self._node_uris = {n: u for n, u in self._node_uris.iteritems() if n in if_map}
+
+        self._if_map = if_map
+        self._if_map_version = version
         return if_map
 
     def __del__(self):
         rospy.delete_param('/pyros' + rospy.get_name() + '/' + self.topic_descr)
+        self.pyros_params.delete('/pyros' + rospy.get_name() + '/' + self.topic_descr)
+        self.pyros_params.close()
 
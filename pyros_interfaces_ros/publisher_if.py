@@ -1,16 +1,158 @@
 from __future__ import absolute_import
 
-import time
+import threading
+import uuid
 from collections import deque
+from io import BytesIO
 
 from .api import rospy_safe as rospy
-from .message_conversion import extract_values, FieldTypeMismatchException
+from .message_conversion import extract_values, extract_values_list, FieldTypeMismatchException
 from .poolparam import PoolParam
+from .throttle import Throttle
 from .topicbase import TopicBase
+from .util import monotonic
 
 
-class PublisherBackTimeout(Exception):
-    pass
+#: overflow policies, when a message arrives and the queue is full
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+
+
+class LazyMsg(object):
+    """
+    A message received serialized, deserialized only when needed, and only once.
+    """
+    __slots__ = ('buff', 'rostype', '_inst')
+
+    def __init__(self, buff, rostype):
+        self.buff = buff
+        self.rostype = rostype
+        self._inst = None
+
+    def deserialize(self):
+        # a race here only means deserializing twice, the result is the same
+        if self._inst is None:
+            self._inst = self.rostype().deserialize(self.buff)
+        return self._inst
+
+
+def _msg_inst(msg):
+    return msg.deserialize() if isinstance(msg, LazyMsg) else msg
+
+
+def _reconcile_subscriber(impl, queue_size=None, buff_size=None, tcp_nodelay=False, **kwargs):
+    """
+    Adapts the shared rospy subscriber implementation when another interface reuses it,
+    so it satisfies all of them : the biggest queue and buffer, and no delay if one asks for it.
+    """
+    if impl.queue_size is not None and (queue_size is None or queue_size > impl.queue_size):
+        impl.set_queue_size(-1 if queue_size is None else queue_size)  # -1 is unbounded for rospy
+    if buff_size is not None:
+        impl.set_buff_size(buff_size)  # rospy keeps the biggest one
+    if tcp_nodelay and not impl.tcp_nodelay:
+        impl.set_tcp_nodelay(True)  # applies to new connections only
+
+
+def _msg_size(msg):
+    if isinstance(msg, LazyMsg):
+        return len(msg.buff)
+    buff = BytesIO()
+    msg.serialize(buff)
+    return buff.tell()
+
+
+class MsgStream(object):
+    """
+    A client stream of the messages received on a topic.
+    Messages are buffered as they arrive, and read in converted batches :
+    a read returns as soon as flush_size messages are buffered, or when the oldest one has been buffered for flush_interval.
+    The buffer is bounded by max_size, so a slow reader only loses its own messages, which are counted.
+    """
+
+    def __init__(self, max_size=100, flush_size=10, flush_interval=0.1, overflow=DROP_OLDEST, binary=False, fields=None, idle_timeout=60, max_wait=0.2):
+        if overflow not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError("overflow policy must be {0} or {1}, not {2}".format(DROP_OLDEST, DROP_NEWEST, overflow))
+        self.id = uuid.uuid4().hex
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.binary = binary
+        self.fields = fields
+        # a stream not read for that long is considered abandoned by its client
+        self.idle_timeout = idle_timeout
+        # the longest time a read can block the node, in seconds, whatever the client asks for. Clients read again instead.
+        self.max_wait = max_wait
+
+        self.buffer = deque()
+        # when the oldest message in the buffer was received
+        self._oldest_time = None
+        self.cond = threading.Condition()
+        # number of messages dropped because the buffer was full, in total and since the last read
+        self.dropped = 0
+        self._dropped_unread = 0
+        self.last_read = monotonic()
+        # set when the stream is closed, to release its reader
+        self.closed = False
+
+    def push(self, msg):
+        with self.cond:
+            if len(self.buffer) >= self.max_size:
+                self.dropped += 1
+                self._dropped_unread += 1
+                if self.overflow == DROP_NEWEST:
+                    return
+                self.buffer.popleft()
+            if not self.buffer:
+                self._oldest_time = monotonic()
+            self.buffer.append(msg)
+            if len(self.buffer) == 1 or len(self.buffer) == self.flush_size:
+                self.cond.notify_all()
+
+    def read(self, timeout=None):
+        """
+        Waits for a batch of messages, and converts it.
+        :param timeout: the maximum time to wait for a first message, in seconds, capped to max_wait. None waits max_wait.
+        :return: a dict {'msgs': [msg_content, ...], 'dropped': number of messages dropped since the last read}.
+                 'msgs' is empty on timeout, or if the stream is closed.
+        """
+        start = monotonic()
+        # the whole read, including the flush interval, is bounded by max_wait
+        max_deadline = start + self.max_wait
+        deadline = max_deadline if timeout is None else start + max(0, min(timeout, self.max_wait))
+        with self.cond:
+            while len(self.buffer) < self.flush_size and not self.closed:
+                now = monotonic()
+                end = min(self._oldest_time + self.flush_interval, max_deadline) if self.buffer else deadline
+                if now >= end:
+                    break
+                self.cond.wait(end - now)
+            batch = list(self.buffer)
+            self.buffer.clear()
+            dropped, self._dropped_unread = self._dropped_unread, 0
+            self.last_read = monotonic()
+        # converting out of the lock, to not block the topic callback
+        return {
+            'msgs': extract_values_list([_msg_inst(m) for m in batch], binary=self.binary, fields=self.fields),
+            'dropped': dropped,
+        }
+
+    def idle(self):
+        return monotonic() - self.last_read > self.idle_timeout
+
+    def close(self):
+        """
+        Releases the reader waiting on this stream, if any.
+        """
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def asdict(self):
+        return {
+            'buffered': len(self.buffer),
+            'dropped': self.dropped,
+        }
 
 
 class PublisherBack(TopicBase):
@@ -31,9 +173,12 @@ class PublisherBack(TopicBase):
     # if we previously stopped publishing / subscribing to this topic
     # usually the count will be just 1, but more is possible during tests
 
-    pool = PoolParam(rospy.Subscriber, "subscribers")
+    pool = PoolParam(rospy.Subscriber, "subscribers", reconcile=_reconcile_subscriber)
+
+    def __init__(self, topic_name, topic_type, msg_queue_size=1, overflow=DROP_OLDEST, binary=False, lazy=False, history_size=0, history_bytes=None, history_age=None, queue_size=1, buff_size=None, tcp_nodelay=False, max_rate=None, max_wait=0.2):
+        if overflow not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError("overflow policy must be {0} or {1}, not {2}".format(DROP_OLDEST, DROP_NEWEST, overflow))
 
-    def __init__(self, topic_name, topic_type, msg_queue_size=1):
         # Parent class will resolve/normalize topic_name
         super(PublisherBack, self).__init__(topic_name, topic_type)
 
@@ -43,21 +188,52 @@ class PublisherBack(TopicBase):
 
         # this message queue should be ready before we setup the callback
         # TODO : change to a proper Queue
+        # newest message on the left, oldest on the right
         self.msg = deque([], msg_queue_size)
+        self.overflow = overflow
+        # whether binary fields are returned as raw bytes by default, instead of base64
+        self.binary = binary
+        # number of messages dropped because the queue was full
+        self.dropped = 0
+        # sequence number of the latest message received, so clients can detect changes
+        self.seq = 0
+        # notified on each message received, for readers waiting for one
+        self._msg_cond = threading.Condition()
+        # the longest time a reader can wait, in seconds, whatever timeout it asks for.
+        # The node does not serve other requests, nor update its interfaces, meanwhile : clients should poll again instead.
+        self.max_wait = max_wait
+        # set on cleanup, to release the readers still waiting
+        self._closed = False
+        # client streams, by id
+        self.streams = {}
+        # history of received messages, as (receive time, size, msg), oldest on the left.
+        # Bounded by number of messages, serialized bytes (measuring costs a serialization, unless lazy) and age.
+        self.history = deque()
+        self.history_size = history_size
+        self.history_bytes = history_bytes
+        self.history_age = history_age
+        self._history_total_bytes = 0
+        # whether messages are stored serialized, and deserialized only when read.
+        # The rospy implementation is shared with the other interfaces on this topic, with the data class of the first one :
+        # a lazy interface can still get deserialized messages, and a non lazy one serialized messages.
+        self.lazy = lazy
+        # limits the rate of messages stored, keeping the latest one. None stores all of them.
+        self.throttle = Throttle(max_rate) if max_rate else None
+        # the latest message, and its converted forms, by conversion options.
+        # Replaced as a whole, so readers never mix a message with the conversions of another one.
+        self._converted = (None, {})
 
-        self.topic = self.pool.acquire(self.name, self.rostype, self.topic_callback, queue_size=1)
+        # rospy subscriber transport options. buff_size None keeps the rospy default.
+        transport = {'queue_size': queue_size, 'tcp_nodelay': tcp_nodelay}
+        if buff_size is not None:
+            transport['buff_size'] = buff_size
+        self.topic = self.pool.acquire(self.name, rospy.AnyMsg if lazy else self.rostype, self.topic_callback, **transport)
 
         self.empty_cb = None
 
-        # Make sure we get at least one connection before returning
-        start = time.time()
-        timeout = 1
-        while time.time() - start < timeout and len(self.pool.get_impl_connections(self.name)) < 1:
-            # print("subscribers connected : {0}".format(self.pool.get_impl_connections(self.name)))
-            time.sleep(0.2)
-
-        if self.pool.get_impl_connections(self.name) < 1:
-            raise PublisherBackTimeout
+        # We do not wait for a connection here. Messages will come when a publisher connects.
+        # Use wait_ready() or on_ready() to know when that happens.
+        self.pool.add_connection_callback(self.name, self._on_connection)
 
     def cleanup(self):
         """
@@ -71,6 +247,13 @@ class PublisherBack(TopicBase):
                 name=self.name, typename=self.rostype))
 
         self.pool.release(self.topic)
+        with self._msg_cond:
+            self._closed = True
+            self._msg_cond.notify_all()
+        for sid in list(self.streams):
+            self.close_stream(sid)
+        if self.throttle is not None:
+            self.throttle.cancel()
 
         super(PublisherBack, self).cleanup()
 
@@ -83,29 +266,224 @@ class PublisherBack(TopicBase):
         """
         d = super(PublisherBack, self).asdict()
         d['publishers'] = self.topic.impl.get_stats_info()
+        # effective settings, the rospy implementation being shared between interfaces on the same topic
+        d['transport'] = {
+            'queue_size': self.topic.impl.queue_size,
+            'buff_size': self.topic.impl.buff_size,
+            'tcp_nodelay': self.topic.impl.tcp_nodelay,
+        }
+        d['streams'] = dict((sid, stream.asdict()) for sid, stream in self.streams.items())
+        if self.throttle is not None:
+            d['throttled'] = self.throttle.dropped
+        if self._history_enabled():
+            d['history'] = {'size': len(self.history), 'bytes': self._history_total_bytes}
         return d
 
-    def get(self, num=0, consume=False):
+    def _history_enabled(self):
+        return bool(self.history_size or self.history_bytes or self.history_age)
+
+    def _trim_history(self, now):
+        # to call with self._msg_cond held
+        while self.history and (
+                (self.history_size and len(self.history) > self.history_size) or
+                (self.history_bytes is not None and self._history_total_bytes > self.history_bytes) or
+                (self.history_age is not None and now - self.history[0][0] > self.history_age)):
+            self._history_total_bytes -= self.history.popleft()[1]
+
+    def get_history(self, last=None, since=None, binary=None, fields=None):
+        """
+        Returns the messages kept in the topic history, oldest first, converted in one batch.
+        Receive times come from this process monotonic clock : use 'now' in the result to relate them to the caller time.
+        :param last: only messages received in the last seconds
+        :param since: only messages received after that time, usually the last stamp the caller got
+        :param binary: whether binary fields are returned as raw bytes. None uses the topic setting.
+        :param fields: the paths of the only fields to return, like ["header.stamp"]. None returns all fields.
+        :return: a dict {'now': current time, 'stamps': [receive time, ...], 'msgs': [msg_content, ...]}
+        """
+        now = monotonic()
+        with self._msg_cond:
+            self._trim_history(now)
+            history = list(self.history)
+        if last is not None:
+            since = max(since, now - last) if since is not None else now - last
+        if since is not None:
+            history = [h for h in history if h[0] > since]
+        try:
+            msgs = extract_values_list([_msg_inst(h[2]) for h in history], binary=self.binary if binary is None else binary, fields=fields)
+        except FieldTypeMismatchException as e:
+            rospy.logerr("[{name}] : field type mismatch {e}".format(name=__name__, e=e))
+            raise
+        return {'now': now, 'stamps': [h[0] for h in history], 'msgs': msgs}
+
+    def open_stream(self, max_size=100, flush_size=10, flush_interval=0.1, overflow=DROP_OLDEST, binary=None, fields=None, idle_timeout=60):
+        """
+        Opens a stream of the messages received from now on (see MsgStream).
+        Streams not read for idle_timeout seconds are closed.
+        :return: the id of the stream, to read it.
+        """
+        # cleaning up streams abandoned by their clients
+        for sid, stream in self.streams.items():
+            if stream.idle():
+                self.close_stream(sid)
+        stream = MsgStream(max_size, flush_size, flush_interval, overflow, self.binary if binary is None else binary, fields, idle_timeout, self.max_wait)
+        self.streams[stream.id] = stream
+        return stream.id
+
+    def read_stream(self, stream_id, timeout=None):
+        """
+        Reads the next batch of messages from a stream (see MsgStream.read)
+        :return: a dict {'msgs': [msg_content, ...], 'dropped': n}, or None if the stream does not exist (anymore)
+        """
+        stream = self.streams.get(stream_id)
+        if stream is None:
+            return None
+        try:
+            return stream.read(timeout)
+        except FieldTypeMismatchException as e:
+            rospy.logerr("[{name}] : field type mismatch {e}".format(name=__name__, e=e))
+            raise
+
+    def close_stream(self, stream_id):
+        stream = self.streams.pop(stream_id, None)
+        if stream is None:
+            return False
+        stream.close()
+        return True
+
+    def wait(self, after_seq=None, timeout=None):
+        """
+        Blocks until a message newer than after_seq has been received.
+        :param after_seq: the sequence number of the last message the caller got.
+                          None waits until there is a message in the queue.
+        :param timeout: the maximum time to wait, in seconds, capped to max_wait. None waits max_wait.
+        :return: True if such a message is available, False on timeout or if the interface is removed.
+        """
+        def arrived():
+            return self.seq > after_seq if after_seq is not None else len(self.msg) > 0
+
+        if arrived():  # fast path, without locking
+            return True
+        deadline = monotonic() + self._cap_wait(timeout)
+        with self._msg_cond:
+            while not arrived():
+                remaining = deadline - monotonic()
+                if remaining <= 0 or self._closed:
+                    return False
+                self._msg_cond.wait(remaining)
+        return True
+
+    def _cap_wait(self, timeout):
+        return self.max_wait if timeout is None else max(0, min(timeout, self.max_wait))
+
+    def get(self, num=0, consume=False, binary=None, fields=None, wait=False, timeout=None, after_seq=None):
+        """
+        Returns the latest message received, converted.
+        :param consume: whether the message is removed from the queue. It is then returned unconverted.
+        :param binary: whether binary fields are returned as raw bytes. None uses the topic setting.
+        :param fields: the paths of the only fields to return, like ["header.stamp"]. None returns all fields.
+        :param wait: whether to block until a message newer than after_seq is received (see wait())
+        :param timeout: the maximum time to wait, in seconds, capped to max_wait. None waits max_wait.
+        :param after_seq: the sequence number of the last message the caller got.
+        :return: the message content, or None if there is no message (or none arrived before timeout)
+        """
+        if wait and not self.wait(after_seq, timeout):
+            return None
         if not self.msg:
             return None
         # TODO : implement a way to have "plug and play" behaviors (some can be "all, paged, FIFO, etc." with custom code that can be insterted here...)
         res = None
         #TODO : implement returning multiple messages ( paging/offset like for long REST requests )
         if consume:
-            res = self.msg.popleft()
+            res = _msg_inst(self.msg.popleft())
             if 0 == len(self.msg) and self.empty_cb:
                 self.empty_cb()
                 #TODO : CHECK that we can survive here even if we get dropped from the topic list
         else:
-            res = self.msg[0]
             try:
-                res = extract_values(res)
+                msg = self.msg[0]
+            except IndexError:  # consumed meanwhile
+                return None
+            try:
+                res = self._get_converted(msg, binary=self.binary if binary is None else binary, fields=fields)
             except FieldTypeMismatchException as e:
                 rospy.logerr("[{name}] : field type mismatch {e}".format(name=__name__, e=e))
                 raise
                 # TODO : reraise a topic exception ?
         return res
 
+    def _get_converted(self, msg, binary, fields):
+        """
+        Converts a message, reusing the conversion already done for the same message and options.
+        The result is shared between readers, and should not be modified.
+        """
+        # fields=[] selects no field at all, unlike fields=None
+        key = (binary, None if fields is None else tuple(fields))
+        converted_msg, converted = self._converted
+        if converted_msg is not msg:
+            converted = {}
+            self._converted = (msg, converted)
+        try:
+            return converted[key]
+        except KeyError:
+            res = extract_values(_msg_inst(msg), binary=binary, fields=fields)
+            converted[key] = res
+            return res
+
+    def snapshot(self, binary=None, fields=None, wait=False, timeout=None, after_seq=None):
+        """
+        Returns the latest message, converted, along with its sequence number
+        :param wait, timeout, after_seq: to block until a message newer than after_seq is received (see wait())
+        :return: a tuple (seq, msg_content). msg_content is None if no message has been received yet.
+        """
+        if wait:
+            self.wait(after_seq, timeout)
+        # reading seq first : if a message arrives in between, we return a newer message with an older seq.
+        # the client will just get it again next time, but never miss it.
+        seq = self.seq
+        return seq, self.get(consume=False, binary=binary, fields=fields)
+
+    def get_batch(self, max_n=None, binary=None, fields=None):
+        """
+        Drains messages from the queue, oldest first, and converts them in one pass.
+        :param max_n: the maximum number of messages to return. None drains the whole queue.
+        :param binary: whether binary fields are returned as raw bytes. None uses the topic setting.
+        :param fields: the paths of the only fields to return, like ["header.stamp"]. None returns all fields.
+        :return: a list of message contents, possibly empty
+        """
+        batch = []
+        while max_n is None or len(batch) < max_n:
+            try:
+                batch.append(self.msg.pop())
+            except IndexError:  # queue is empty
+                break
+        if batch and 0 == len(self.msg) and self.empty_cb:
+            self.empty_cb()
+        try:
+            return extract_values_list([_msg_inst(m) for m in batch], binary=self.binary if binary is None else binary, fields=fields)
+        except FieldTypeMismatchException as e:
+            rospy.logerr("[{name}] : field type mismatch {e}".format(name=__name__, e=e))
+            raise
+
+    def get_serialized(self, consume=False):
+        """
+        Returns the latest message as ROS serialized data, without any conversion.
+        :return: a dict {'type': type name, 'md5sum': md5sum, 'data': serialized bytes},
+                 or None if no message has been received yet.
+        """
+        try:
+            msg = self.msg.popleft() if consume else self.msg[0]
+        except IndexError:  # queue is empty
+            return None
+        if consume and 0 == len(self.msg) and self.empty_cb:
+            self.empty_cb()
+        if isinstance(msg, LazyMsg):
+            data = msg.buff
+        else:
+            buff = BytesIO()
+            msg.serialize(buff)
+            data = buff.getvalue()
+        return {'type': self.rostype._type, 'md5sum': self.rostype._md5sum, 'data': data}
+
     #returns the number of unread message
     def unread(self):
         return len(self.msg)
@@ -114,6 +492,33 @@ class PublisherBack(TopicBase):
         self.empty_cb = cb
 
     def topic_callback(self, msg):
-        # TODO : we are duplicating the queue behavior that is already in rospy... Is there a better way ?
-        self.msg.appendleft(msg)
+        if self.throttle is not None:
+            self.throttle(self._store, msg)
+        else:
+            self._store(msg)
 
+    def _store(self, msg):
+        if isinstance(msg, rospy.AnyMsg):  # lazy, or sharing the rospy subscriber of a lazy interface
+            msg = LazyMsg(msg._buff, self.rostype)
+        # streams and history have their own buffers
+        for stream in self.streams.values():
+            stream.push(msg)
+        if self._history_enabled():
+            now = monotonic()
+            size = _msg_size(msg) if self.history_bytes is not None else 0
+            with self._msg_cond:
+                self.history.append((now, size, msg))
+                self._history_total_bytes += size
+                self._trim_history(now)
+
+        # TODO : we are duplicating the queue behavior that is already in rospy... Is there a better way ?
+        if len(self.msg) == self.msg.maxlen:
+            self.dropped += 1
+            if self.overflow == DROP_NEWEST:
+                return
+        with self._msg_cond:
+            # when full, the deque drops the oldest message itself
+            self.msg.appendleft(msg)
+            self._converted = (None, {})
+            self.seq += 1
+            self._msg_cond.notify_all()
@@ -1,7 +1,6 @@
 from __future__ import absolute_import
 
 import logging
-from itertools import ifilter
 
 import rostopic
 
@@ -14,7 +13,10 @@ _logger = logging.getLogger(__name__)
 
 from pyros_interfaces_common.transient_if_pool import TransientIfPool, DiffTuple
 
+from .parallel_if_pool import ParallelTransientIfPool
+
 from .topicbase import TopicTuple
+from .util import type_index, regex_options
 from .publisher_if import PublisherBack
 from .subscriber_if import SubscriberBack
 
@@ -26,15 +28,17 @@ except ImportError:
 
 
 
-class RosPublisherIfPool(TransientIfPool):
+class RosPublisherIfPool(ParallelTransientIfPool):
 
     """
     MockInterface.
     """
-    def __init__(self, publishers=None):
+    def __init__(self, publishers=None, max_workers=None, options=None):
+        #: options for the publisher interfaces, as a dict {topic regex: PublisherBack keyword arguments}
+        self.options = options or {}
         # This base constructor assumes the system to interface with is already available ( can do a get_svc_available() )
         # CAREFUL publisher interfaces are subscribers
-        super(RosPublisherIfPool, self).__init__(publishers, transients_desc="subscribers")
+        super(RosPublisherIfPool, self).__init__(publishers, transients_desc="subscribers", max_workers=max_workers)
 
     def get_transients_available(self):  # function returning all services available on the system
         return self.available
@@ -54,7 +58,9 @@ class RosPublisherIfPool(TransientIfPool):
             return None
 
     def TransientMaker(self, topic_name, topic_type, *args, **kwargs):  # the service class implementation
-        return PublisherBack(topic_name, topic_type, *args, **kwargs)
+        options = regex_options(topic_name, self.options)
+        options.update(kwargs)
+        return PublisherBack(topic_name, topic_type, *args, **options)
 
     def TransientCleaner(self, topic):  # the topic class cleanup implementation
         return topic.cleanup()
@@ -102,10 +108,10 @@ class RosPublisherIfPool(TransientIfPool):
         :return: a Difftuple, suitable to pass directly to
         """
 
+        topic_types = type_index(topic_types)
         self.available = dict()
         for t in publishers:  # we assume t[1] is never empty here
-            tt = next(ifilter(lambda ltt: t[0] == ltt[0], topic_types), [])
-            ttp = TopicTuple(name=t[0], type=tt[1] if len(tt) > 0 else None, endpoints=set(t[1]))
+            ttp = TopicTuple(name=t[0], type=topic_types.get(t[0]), endpoints=set(t[1]))
             self.available[ttp.name] = ttp
 
         return publishers
@@ -136,10 +142,11 @@ class RosPublisherIfPool(TransientIfPool):
             removed=[[k, v] for k, v in removed_pubs.iteritems()]
         )
         computed_publishers_dt = DiffTuple([], [])
+        topic_types_added = type_index(topic_types_dt.added)
+        topic_types_removed = type_index(topic_types_dt.removed)
         _logger.debug("topics_dt : {publishers_dt}".format(**locals()))
         for t in publishers_dt.added:
-            tt = next(ifilter(lambda ltt: t[0] == ltt[0], topic_types_dt.added), [])
-            ttp = TopicTuple(name=t[0], type=tt[1] if len(tt) > 0 else None, endpoints=set(t[1]))
+            ttp = TopicTuple(name=t[0], type=topic_types_added.get(t[0]), endpoints=set(t[1]))
             if ttp.name in self.available:
                 # if already available, we only update the endpoints list
                 self.available[ttp.name].endpoints |= ttp.endpoints
@@ -148,8 +155,7 @@ class RosPublisherIfPool(TransientIfPool):
                 computed_publishers_dt.added.append(t[0])
 
         for t in publishers_dt.removed:
-            tt = next(ifilter(lambda ltt: t[0] == ltt[0], topic_types_dt.removed), [])
-            ttp = TopicTuple(name=t[0], type=tt[1] if len(tt) > 0 else None, endpoints=set(t[1]))
+            ttp = TopicTuple(name=t[0], type=topic_types_removed.get(t[0]), endpoints=set(t[1]))
             if ttp.name in self.available:
                 self.available[ttp.name].endpoints -= ttp.endpoints
                 if not self.available[ttp.name].endpoints:
@@ -247,7 +253,7 @@ class RosPublisherIfPool(TransientIfPool):
         publishers_namelist_dt = self.compute_state(DiffTuple(
             added=publishers_dt_added,
             removed=publishers_dt_removed
-        ), topic_types_dt or [])
+        ), topic_types_dt or DiffTuple([], []))
 
         if publishers_namelist_dt.added or publishers_namelist_dt.removed:
             _logger.debug(
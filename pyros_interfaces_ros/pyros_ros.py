@@ -6,6 +6,7 @@ import yaml
 
 import six
 from pyros_interfaces_common.basenode import PyrosBase
+from pyros_interfaces_common.regex_tools import regex_match_sublist
 from pyros_interfaces_common.utils import deprecated
 
 from . import config
@@ -24,6 +25,8 @@ class PyrosROS(PyrosBase):
         'TOPICS': [],
         'SERVICES': [],
         'PARAMS': [],
+        'PUBLISHERS_OPTIONS': {},
+        'SUBSCRIBERS_OPTIONS': {},
         'ROS_USE_CONNECTION_CACHE': False,
         'ROS_CONNECTION_CACHE_LIST_TOPIC': "/rocon/connection_cache/list",
         'ROS_CONNECTION_CACHE_DIFF_TOPIC': "/rocon/connection_cache/diff",
@@ -69,6 +72,20 @@ class PyrosROS(PyrosBase):
             _logger.info("Loading overlayed configuration \n{0}".format(yaml.dump(config)))
             self.config_handler.configure(pyros_config)  # configuring with argument passed from user
 
+        # extra services, specific to ROS
+        self.provides(self.publishers_snapshot)
+        self.provides(self.publisher_batch)
+        self.provides(self.publisher_poll)
+        self.provides(self.publisher_history)
+        self.provides(self.publisher_stream_open)
+        self.provides(self.publisher_stream_read)
+        self.provides(self.publisher_stream_close)
+        self.provides(self.publish_many)
+        self.provides(self.publish_batch)
+        self.provides(self.publisher_serialized)
+        self.provides(self.subscriber_serialized)
+        self.provides(self.service_serialized)
+
 
     # TODO: get rid of this to need one less client-node call
     # we need make the message type visible to client,
@@ -88,13 +105,13 @@ class PyrosROS(PyrosBase):
 
     # These should match the design of RostfulClient and Protocol so we are consistent between pipe and python API
     #BWCOMPAT
-    def topic(self, name, msg_content=None):
+    def topic(self, name, msg_content=None, binary=None):
         res = None
         if self.interface:
             if msg_content is not None and name in self.interface.subscribers.keys():
-                self.interface.subscribers.get(name).publish(msg_content)
+                self.interface.subscribers.get(name).publish(msg_content, binary=binary)
             elif name in self.interface.publishers.keys():
-                res = self.interface.publishers.get(name).get(consume=False)
+                res = self.interface.publishers.get(name).get(consume=False, binary=binary)
         return res
 
     def topics(self):
@@ -108,10 +125,53 @@ class PyrosROS(PyrosBase):
                 topics_dict[t] = tinst.asdict()
         return topics_dict
 
-    def publisher(self, name):
+    def publisher(self, name, binary=None, fields=None, wait=False, timeout=None, after_seq=None):
         res = None
         if self.interface and name in self.interface.publishers.keys():
-            res = self.interface.publishers.get(name).get(consume=False)
+            res = self.interface.publishers.get(name).get(consume=False, binary=binary, fields=fields, wait=wait, timeout=timeout, after_seq=after_seq)
+        return res
+
+    def publisher_poll(self, name, after_seq=None, timeout=None, binary=None, fields=None):
+        """
+        Waits for a message newer than after_seq on a topic, and returns it with its sequence number.
+        This node does not serve other requests while waiting, so the wait is capped to the max_wait option of the topic
+        (0.2s by default), and the caller should poll again on timeout.
+        :param name: the name of the topic
+        :param after_seq: the sequence number the caller already got. None waits for any message.
+        :param timeout: the maximum time to wait, in seconds, capped to the max_wait option of the topic.
+        :param binary: whether binary fields are returned as raw bytes. None uses the topic setting.
+        :param fields: the paths of the only fields to return, like ["header.stamp"]. None returns all fields.
+        :return: a dict {'seq': seq, 'msg': msg_content}, with seq not greater than after_seq on timeout,
+                 or None if the topic is not interfaced
+        """
+        res = None
+        if self.interface and name in self.interface.publishers.keys():
+            seq, msg = self.interface.publishers.get(name).snapshot(binary=binary, fields=fields, wait=True, timeout=timeout, after_seq=after_seq)
+            res = {'seq': seq, 'msg': msg}
+        return res
+
+    def publishers_snapshot(self, names_or_regex, since=None):
+        """
+        Retrieves the latest message of multiple publishers in one call.
+        :param names_or_regex: a list of publisher names, or a regex matching publisher names
+        :param since: a dict {name: seq} of the sequence numbers the caller already got.
+                      Publishers that did not receive any message since then are skipped.
+        :return: a dict {name: {'seq': seq, 'msg': msg_content}}
+        """
+        res = {}
+        if self.interface:
+            if isinstance(names_or_regex, six.string_types):
+                names = regex_match_sublist(names_or_regex, self.interface.publishers.keys())
+            else:
+                names = [n for n in names_or_regex if n in self.interface.publishers.keys()]
+
+            since = since or {}
+            for name in names:
+                pub = self.interface.publishers.get(name)
+                if pub is None or (name in since and pub.seq <= since[name]):
+                    continue  # gone meanwhile or unchanged
+                seq, msg = pub.snapshot()
+                res[name] = {'seq': seq, 'msg': msg}
         return res
 
     def publishers(self):
@@ -121,10 +181,45 @@ class PyrosROS(PyrosBase):
                 publishers_dict[t] = tinst.asdict()
         return publishers_dict
 
-    def subscriber(self, name, msg_content):
+    def subscriber(self, name, msg_content, binary=None):
+        res = None
+        if self.interface and name in self.interface.subscribers.keys():
+            self.interface.subscribers.get(name).publish(msg_content, binary=binary)
+        return res
+
+    def publish_many(self, name, msgs_content, rate=None, binary=None):
+        """
+        Publishes a list of messages on a topic, in one call.
+        Careful : this node does not serve other requests while pacing messages at rate.
+        :param name: the name of the topic
+        :param msgs_content: the list of messages contents
+        :param rate: the rate to publish messages at, in Hz. None publishes them all at once.
+        :param binary: whether binary fields are passed as raw bytes. None uses the topic setting.
+        :return: the number of messages published, or None if the topic is not interfaced
+        """
         res = None
         if self.interface and name in self.interface.subscribers.keys():
-            self.interface.subscribers.get(name).publish(msg_content)
+            res = self.interface.subscribers.get(name).publish_many(msgs_content, rate=rate, binary=binary)
+        return res
+
+    def publish_batch(self, batch, rate=None, binary=None):
+        """
+        Publishes lists of messages on multiple topics, in one call.
+        Careful : this node does not serve other requests while pacing messages at rate.
+        :param batch: a dict {name: [msg_content, ...]}. Topics not interfaced are ignored.
+        :param rate: the rate to publish messages at, in Hz. Messages at the same index in each list are published together.
+                     None publishes them all at once.
+        :param binary: whether binary fields are passed as raw bytes. None uses each topic setting.
+        :return: a dict {name: number of messages published}
+        """
+        # imported here, since ROS modules are only available in the node process
+        from .subscriber_if import publish_batch
+
+        res = {}
+        if self.interface:
+            subs = dict((self.interface.subscribers.get(name), name) for name in batch if name in self.interface.subscribers.keys())
+            published = publish_batch(dict((sub, batch[name]) for sub, name in subs.items()), rate=rate, binary=binary)
+            res = dict((subs[sub], n) for sub, n in published.items())
         return res
 
     def subscribers(self):
@@ -169,14 +264,132 @@ class PyrosROS(PyrosBase):
                 params_dict[p] = pinst.asdict()
         return params_dict
 
-    def setup(self, publishers=None, subscribers=None, services=None, topics=None, params=None, enable_cache=False):
+    def publisher_batch(self, name, max_n=None, binary=None, fields=None):
+        """
+        Drains the messages received on a topic, oldest first.
+        :param name: the name of the topic
+        :param max_n: the maximum number of messages to return. None drains all of them.
+        :param binary: whether binary fields are returned as raw bytes. None uses the topic setting.
+        :param fields: the paths of the only fields to return, like ["header.stamp"]. None returns all fields.
+        :return: a list of message contents, or None if the topic is not interfaced
+        """
+        res = None
+        if self.interface and name in self.interface.publishers.keys():
+            res = self.interface.publishers.get(name).get_batch(max_n, binary=binary, fields=fields)
+        return res
+
+    def publisher_history(self, name, last=None, since=None, binary=None, fields=None):
+        """
+        Retrieves the history of a topic, as configured with the history_* publishers options.
+        :param name: the name of the topic
+        :param last: only messages received in the last seconds
+        :param since: only messages received after that time, as returned in 'now' or 'stamps'
+        :param binary: whether binary fields are returned as raw bytes. None uses the topic setting.
+        :param fields: the paths of the only fields to return, like ["header.stamp"]. None returns all fields.
+        :return: a dict {'now': current time, 'stamps': [receive time, ...], 'msgs': [msg_content, ...]},
+                 or None if the topic is not interfaced
+        """
+        res = None
+        if self.interface and name in self.interface.publishers.keys():
+            res = self.interface.publishers.get(name).get_history(last=last, since=since, binary=binary, fields=fields)
+        return res
+
+    def publisher_stream_open(self, name, max_size=100, flush_size=10, flush_interval=0.1, overflow='drop_oldest', binary=None, fields=None, idle_timeout=60):
+        """
+        Opens a stream of the messages received on a topic from now on, to read them in batches.
+        :param name: the name of the topic
+        :param max_size: the maximum number of messages buffered for this stream. Others are dropped, and counted.
+        :param flush_size: a read returns as soon as this number of messages is buffered
+        :param flush_interval: a read returns at most this time after it started, if messages are buffered
+        :param overflow: 'drop_oldest' or 'drop_newest', when the stream buffer is full
+        :param binary: whether binary fields are returned as raw bytes. None uses the topic setting.
+        :param fields: the paths of the only fields to return, like ["header.stamp"]. None returns all fields.
+        :param idle_timeout: the stream is closed if not read for that long, in seconds
+        :return: the stream id, or None if the topic is not interfaced
+        """
+        res = None
+        if self.interface and name in self.interface.publishers.keys():
+            res = self.interface.publishers.get(name).open_stream(max_size=max_size, flush_size=flush_size, flush_interval=flush_interval, overflow=overflow, binary=binary, fields=fields, idle_timeout=idle_timeout)
+        return res
+
+    def publisher_stream_read(self, name, stream_id, timeout=None):
+        """
+        Reads the next batch of messages from a stream.
+        This node does not serve other requests while waiting, so the wait is capped to the max_wait option of the topic
+        (0.2s by default), and the caller should read again when no message is returned.
+        :param name: the name of the topic
+        :param stream_id: the id returned by publisher_stream_open
+        :param timeout: the maximum time to wait for a first message, in seconds, capped to the max_wait option of the topic.
+        :return: a dict {'msgs': [msg_content, ...], 'dropped': number of messages dropped since the last read},
+                 or None if the topic is not interfaced or the stream was closed
+        """
+        res = None
+        if self.interface and name in self.interface.publishers.keys():
+            res = self.interface.publishers.get(name).read_stream(stream_id, timeout=timeout)
+        return res
+
+    def publisher_stream_close(self, name, stream_id):
+        res = None
+        if self.interface and name in self.interface.publishers.keys():
+            res = self.interface.publishers.get(name).close_stream(stream_id)
+        return res
+
+    def publisher_serialized(self, name, consume=False):
+        """
+        Retrieves the latest message of a topic as ROS serialized data, skipping any conversion.
+        :param name: the name of the topic
+        :return: a dict {'type': type name, 'md5sum': md5sum, 'data': serialized bytes},
+                 or None if the topic is not interfaced or no message has been received yet
+        """
+        res = None
+        if self.interface and name in self.interface.publishers.keys():
+            res = self.interface.publishers.get(name).get_serialized(consume=consume)
+        return res
+
+    def subscriber_serialized(self, name, data, md5sum=None):
+        """
+        Publishes ROS serialized data on a topic, skipping any conversion.
+        :param name: the name of the topic
+        :param data: the serialized message
+        :param md5sum: the md5sum of the type data was serialized with. None skips the check.
+        """
+        res = None
+        if self.interface and name in self.interface.subscribers.keys():
+            self.interface.subscribers.get(name).publish_serialized(data, md5sum=md5sum)
+        return res
+
+    def service_serialized(self, name, data, md5sum=None):
+        """
+        Calls a service with a ROS serialized request, skipping any conversion.
+        :param name: the name of the service
+        :param data: the serialized request
+        :param md5sum: the md5sum of the request type data was serialized with. None skips the check.
+        :return: a dict {'type': type name, 'md5sum': md5sum, 'data': serialized bytes} for the response,
+                 or None if the service is not interfaced
+        """
+        resp = None
+        if self.interface and name in self.interface.services.keys():
+            resp = self.interface.services.get(name).call_serialized(data, md5sum=md5sum)
+        return resp
+
+    def setup(self, publishers=None, subscribers=None, services=None, topics=None, params=None, enable_cache=False, full_update_period=None, transient_workers=None, param_names_period=None, publishers_options=None, subscribers_options=None):
         """
         Service to dynamically setup the node.
         Node we cannot pass the name here as it should be set only once, the first time
         """
+        # per topic options default to the configuration
+        if publishers_options is None:
+            publishers_options = self.config.get('PUBLISHERS_OPTIONS')
+        if subscribers_options is None:
+            subscribers_options = self.config.get('SUBSCRIBERS_OPTIONS')
+
+        # the previous interface is replaced : stopping its threads
+        if self.interface is not None:
+            self.interface.stop()
+
         # we get self.name and self.argv from the duplicated parent process memory.
         # this will create self.interface
-        super(PyrosROS, self).setup(node_name=self.name, publishers=publishers, subscribers=subscribers, services=services, topics=topics, params=params, enable_cache=enable_cache, argv=self.argv)
+        super(PyrosROS, self).setup(node_name=self.name, publishers=publishers, subscribers=subscribers, services=services, topics=topics, params=params, enable_cache=enable_cache, full_update_period=full_update_period, transient_workers=transient_workers, param_names_period=param_names_period, publishers_options=publishers_options, subscribers_options=subscribers_options, argv=self.argv)
 
     def run(self, *args, **kwargs):
         """
@@ -4,7 +4,6 @@ from __future__ import print_function
 import os
 from collections import namedtuple, MutableMapping
 from copy import deepcopy, copy
-from itertools import ifilter
 import logging
 
 import pyros_utils
@@ -30,6 +29,8 @@ from .param_if_pool import RosParamIfPool
 from .service_if_pool import RosServiceIfPool
 from .subscriber_if_pool import RosSubscriberIfPool
 from .publisher_if_pool import RosPublisherIfPool
+from .type_cache import get_type_cache
+from .util import type_index
 
 from .connection_cache_utils import connection_cache_proxy_create, connection_cache_marshall, connection_cache_merge_marshalled
 
@@ -47,7 +48,7 @@ class RosInterface(BaseInterface):
     """
     RosInterface.
     """
-    def __init__(self, node_name, publishers=None, subscribers=None, services=None, params=None, enable_cache=False, argv=None):
+    def __init__(self, node_name, publishers=None, subscribers=None, services=None, params=None, enable_cache=False, full_update_period=None, transient_workers=None, param_names_period=None, publishers_options=None, subscribers_options=None, argv=None):
         # This runs in a child process (managed by PyrosROS) and as a normal ros node)
 
         # First thing to do : find the rosmaster...
@@ -87,31 +88,61 @@ class RosInterface(BaseInterface):
         subscribers += list(set(ast.literal_eval(rospy.get_param('~subscribers', "[]"))))
 
         params += list(set(ast.literal_eval(rospy.get_param('~params', "[]"))))
+
+        # per topic regex options
+        publishers_options = dict(publishers_options or {})
+        publishers_options.update(ast.literal_eval(rospy.get_param('~publishers_options', "{}")))
+        subscribers_options = dict(subscribers_options or {})
+        subscribers_options.update(ast.literal_eval(rospy.get_param('~subscribers_options', "{}")))
         enable_cache = rospy.get_param('~enable_cache', enable_cache)
 
         if enable_cache is not None:
             self.enable_cache = enable_cache
+
+        #: period (in seconds) of the full state reconciliation with the master, when using the connection cache.
+        #: None disables it : we then rely only on connection cache diffs.
+        self.full_update_period = rospy.get_param('~full_update_period', full_update_period)
+        self._last_full_update = None
+        #: last drift corrected by the full state reconciliation
+        self.last_drift = None
+
+        #: number of threads building interfaces in parallel. None builds them one after the other.
+        self.transient_workers = rospy.get_param('~transient_workers', transient_workers)
+
+        #: period (in seconds) of the param names retrieval from the master. None retrieves them on every update.
+        self.param_names_period = rospy.get_param('~param_names_period', param_names_period)
+
         # Note : None means no change ( different from [] )
         rospy.loginfo("""[{name}] ROS Interface initialized with:
         -    services : {services}
         -    publishers : {publishers}
         -    subscribers : {subscribers}
         -    params : {params}
+        -    publishers_options : {publishers_options}
+        -    subscribers_options : {subscribers_options}
         -    enable_cache : {enable_cache}
+        -    full_update_period : {full_update_period}
+        -    transient_workers : {transient_workers}
+        -    param_names_period : {param_names_period}
         """.format(
             name=__name__,
             publishers="\n" + "- ".rjust(10) + "\n\t- ".join(publishers) if publishers else [],
             subscribers="\n" + "- ".rjust(10) + "\n\t- ".join(subscribers) if subscribers else [],
             services="\n" + "- ".rjust(10) + "\n\t- ".join(services) if services else [],
             params="\n" + "- ".rjust(10) + "\n\t- ".join(params) if params else [],
-            enable_cache=enable_cache)
+            publishers_options=publishers_options,
+            subscribers_options=subscribers_options,
+            enable_cache=enable_cache,
+            full_update_period=self.full_update_period,
+            transient_workers=self.transient_workers,
+            param_names_period=self.param_names_period)
         )
 
         # This base constructor assumes the system to interface with is already available ( can do a get_svc_available() )
-        params_pool = RosParamIfPool(params)
-        services_pool = RosServiceIfPool(services)
-        subscribers_pool = RosSubscriberIfPool(subscribers)
-        publishers_pool = RosPublisherIfPool(publishers)
+        params_pool = RosParamIfPool(params, names_update_period=self.param_names_period)
+        services_pool = RosServiceIfPool(services, max_workers=self.transient_workers)
+        subscribers_pool = RosSubscriberIfPool(subscribers, max_workers=self.transient_workers, options=subscribers_options)
+        publishers_pool = RosPublisherIfPool(publishers, max_workers=self.transient_workers, options=publishers_options)
 
         super(RosInterface, self).__init__(publishers_pool, subscribers_pool, services_pool, params_pool)
 
@@ -140,14 +171,24 @@ class RosInterface(BaseInterface):
         self._debug_logger.setLevel(logging.DEBUG)
         self._debug_logger.addHandler(file_handler)
 
-    def retrieve_system_state(self):
+    def stop(self):
+        """
+        Stops the threads started by this interface, before it is replaced or the node shuts down.
+        """
+        for pool in (self.publishers_if_pool, self.subscribers_if_pool, self.services_if_pool):
+            pool.stop()
+        # writing the type descriptors not saved yet
+        get_type_cache().flush()
+
+    def retrieve_system_state(self, from_master=False):
         """
         This will retrieve the system state from ROS master if needed, and apply changes to local variable to keep
         a local representation of the connections available up to date.
+        :param from_master: whether to call the master even if we have a connection cache
         """
         try:
             # we call the master only if we dont get system_state from connection cache
-            if self.enable_cache and self.connection_cache is not None:
+            if self.enable_cache and self.connection_cache is not None and not from_master:
                 publishers, subscribers, services = self.connection_cache.getSystemState()
                 topic_types = self.connection_cache.getTopicTypes()
                 try:
@@ -161,7 +202,7 @@ class RosInterface(BaseInterface):
                 service_types = []  # master misses this API to be consistent
 
             # Getting this doesnt depend on cache for now
-            params = set(rospy.get_param_names())
+            params = self.params_if_pool.get_param_names(force=from_master)
 
             return publishers, subscribers, services, params, topic_types, service_types
 
@@ -171,7 +212,12 @@ class RosInterface(BaseInterface):
     # for use with line_profiler or memory_profiler
     # Not working yet... need to solve multiprocess profiling issues...
     #@profile
-    def update(self):
+    def update(self, reconcile=True):
+        """
+        Updates the interfaces from the connection cache diffs, or from the master state.
+        :param reconcile: whether the full state from the master is used when full_update_period is elapsed
+        :return: the DiffTuple of interfaces changed
+        """
 
         backedup_complete_cb_ss = None
 
@@ -196,10 +242,10 @@ class RosInterface(BaseInterface):
             # dynamically switching cache on and off.
             self.connection_cache = None
 
-        # TODO Instead of one or the other, we should have "two layer behaviors" with different frequencies
-        # Fast loop checking only diff
-        # Slow loop checking full state
-        # It will allow recovering from any mistakes because of wrong diffs (update speed/race conditions/etc.)
+        # "two layer behaviors" with different frequencies :
+        # Fast loop checking only diff (from the connection cache)
+        # Slow loop checking full state (from the master, every full_update_period)
+        # It allows recovering from any mistakes because of wrong diffs (update speed/race conditions/etc.)
         if self.enable_cache:
             if self.connection_cache is None:  # Building Connection Cache Proxy if needed
                 self.connection_cache = connection_cache_proxy_create(self._proxy_cb)
@@ -208,9 +254,14 @@ class RosInterface(BaseInterface):
                 else:
                     self.enable_cache = False
 
+        if reconcile and self.connection_cache and self.full_update_period is not None and (
+            self._last_full_update is None or time.time() - self._last_full_update >= self.full_update_period
+        ):
+            return self.update_reconcile()
+
         # TMP until it s implemented in the connection cache
         # Because the cache doesnt currently do it
-        params = set(rospy.get_param_names())
+        params = self.params_if_pool.get_param_names()
         # determining params diff despite lack of API
         params_dt = DiffTuple(
             added=[p for p in params if p not in self.params_available],
@@ -314,6 +365,49 @@ class RosInterface(BaseInterface):
             # ==> We need to wait for next message...
             return self.update_nodelta(params_dt)
 
+    def update_reconcile(self):
+        """
+        Slow loop : reconciling our state representation with the full state from the master.
+        Any difference with the state built from connection cache diffs is reported as drift.
+        :return: the DiffTuple of interfaces changed
+        """
+        # applying the diffs received until now first, so that only what they missed is reported as drift
+        pending_dt = DiffTuple([], [])
+        while self.cb_ss.qsize() > 0:
+            dt = self.update(reconcile=False)
+            pending_dt = DiffTuple(added=pending_dt.added + dt.added, removed=pending_dt.removed + dt.removed)
+
+        available_before = {
+            'publishers': set(self.publishers_if_pool.available),
+            'subscribers': set(self.subscribers_if_pool.available),
+            'services': set(self.services_if_pool.available),
+        }
+
+        state = self.retrieve_system_state(from_master=True)  # This will call the master
+        if state is None:  # master not reachable, we will try again next time
+            return pending_dt
+        self._last_full_update = time.time()
+
+        dt = self.update_fullstate(*state)
+
+        available_after = {
+            'publishers': set(self.publishers_if_pool.available),
+            'subscribers': set(self.subscribers_if_pool.available),
+            'services': set(self.services_if_pool.available),
+        }
+
+        self.last_drift = {
+            k: DiffTuple(
+                added=list(available_after[k] - available_before[k]),
+                removed=list(available_before[k] - available_after[k])
+            ) for k in available_before
+        }
+        for k, drift in self.last_drift.iteritems():
+            if drift.added or drift.removed:
+                rospy.logwarn("[{name}] Full state reconciliation corrected {k} drift : {drift}".format(name=__name__, **locals()))
+
+        return DiffTuple(added=pending_dt.added + dt.added, removed=pending_dt.removed + dt.removed)
+
     def update_fullstate(self, publishers, subscribers, services, params, topic_types, service_types):
         # NORMAL full update
         self._debug_logger.debug("""SYSTEM STATE :
@@ -327,6 +421,10 @@ class RosInterface(BaseInterface):
 
         # TODO : unify with the reset behavior in case of cache...
 
+        # Building name -> type indexes only once, shared by all pools
+        topic_types = type_index(topic_types)
+        service_types = type_index(service_types)
+
         # Needs to be done first, since topic algorithm depends on it
         # print("PARAMS : {params}".format(**locals()))
         params_if_dt = self.params_if_pool.update(params=params)
@@ -409,8 +507,8 @@ class RosInterface(BaseInterface):
         )
 
         service_types_dt = DiffTuple(
-            added=added_service_types,
-            removed=removed_service_types
+            added=type_index(added_service_types),
+            removed=type_index(removed_service_types)
         )
 
         services_if_dt = self.services_if_pool.update_delta(services_dt, service_types_dt)
@@ -442,9 +540,10 @@ class RosInterface(BaseInterface):
         # # we also need to simulate topic removal here (only names), to trigger a cleanup of interface if it s last one
         # removed_topics_list = [[td, removed_topics[td]] for td in removed_topics] + early_topics_to_drop
 
+        # Building name -> type indexes only once, shared by all pools
         topic_types_dt = DiffTuple(
-            added=added_topic_types,
-            removed=removed_topic_types
+            added=type_index(added_topic_types),
+            removed=type_index(removed_topic_types)
         )
 
         subscribers_if_dt = self.subscribers_if_pool.update_delta(subscribers_dt, topic_types_dt)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+from __future__ import absolute_import, print_function
+
+import os
+import sys
+import timeit
+
+# This is needed if running this benchmark directly
+# prepending because ROS relies on package dirs list in PYTHONPATH and not isolated virtualenvs
+# And we need our current module to be found first.
+current_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+# if not current_path in sys.path:
+sys.path.insert(1, current_path)  # sys.path[0] is always current path as per python spec
+
+# Unit test import (  will emulate ROS setup if needed )
+from pyros_interfaces_ros.ros_interface import RosInterface
+
+from pyros_utils import rostest_nose
+
+
+# Scaling benchmark for RosInterface.update_fullstate.
+# The master state is synthetic, so only the interface algorithms are measured, not the master itself.
+# This is not a test, and is not run by nose. Run it directly :
+# $ python bench_update_fullstate.py
+
+
+def synthetic_state(topic_count, nodes_per_topic=3):
+    """
+    Builds a synthetic system state, in the same format as the master API
+    :param topic_count: the number of topics (and services) in the system
+    :param nodes_per_topic: the number of endpoints for each topic
+    :return: publishers, subscribers, services, params, topic_types, service_types
+    """
+    publishers = []
+    subscribers = []
+    services = []
+    topic_types = []
+    service_types = []
+    for t in range(topic_count):
+        nodes = ['/bench_node_{0}'.format((t + n) % 100) for n in range(nodes_per_topic)]
+        publishers.append(['/bench/topic_{0}'.format(t), nodes])
+        subscribers.append(['/bench/topic_{0}'.format(t), nodes])
+        services.append(['/bench/service_{0}'.format(t), nodes[:1]])
+        topic_types.append(['/bench/topic_{0}'.format(t), 'std_msgs/String'])
+        service_types.append(['/bench/service_{0}'.format(t), 'std_srvs/Empty'])
+    params = set('/bench/param_{0}'.format(t) for t in range(topic_count))
+    return publishers, subscribers, services, params, topic_types, service_types
+
+
+def bench(interface, sizes=(100, 1000, 10000), repeat=3):
+    results = {}
+    for size in sizes:
+        state = synthetic_state(size)
+        results[size] = min(timeit.repeat(lambda: interface.update_fullstate(*state), number=1, repeat=repeat))
+        print("update_fullstate with {size} topics : {time:.4f} s".format(size=size, time=results[size]))
+    return results
+
+
+if __name__ == '__main__':
+    if not rostest_nose.is_rostest_enabled():
+        rostest_nose.rostest_nose_setup_module()
+    try:
+        # nothing exposed : we measure the state representation update and change detection only.
+        bench(RosInterface('bench_update_fullstate'))
+    finally:
+        if not rostest_nose.is_rostest_enabled():
+            rostest_nose.rostest_nose_teardown_module()
@@ -1722,6 +1722,18 @@ class TestRosInterfaceCache(TestRosInterface):
         assert not self.connection_cache_proc.is_alive()
         time.sleep(1)  # TODO : investigate : we shouldnt need this
 
+    def test_full_update_reconcile_drift(self):
+        self.interface.full_update_period = 0  # reconciling with the master on every update
+        self.interface.update()
+        self.assertTrue('/test/string' in self.interface.publishers_available)
+
+        # simulating a mistake in the diffs : a publisher we missed
+        self.interface.publishers_if_pool.available.pop('/test/string', None)
+        self.interface.update()
+        # the reconciliation found it again, and reported the drift
+        self.assertTrue('/test/string' in self.interface.publishers_available)
+        self.assertTrue('/test/string' in self.interface.last_drift['publishers'].added)
+
     # explicitely added here only needed to help the debugger.
 
     # TODO : investigate this
@@ -6,6 +6,7 @@ import sys
 import logging
 import os
 import pickle
+from io import BytesIO
 
 # This is needed if running this test directly (without using nose loader)
 # prepending because ROS relies on package dirs list in PYTHONPATH and not isolated virtualenvs
@@ -148,6 +149,24 @@ class TestService(unittest.TestCase):
         except KeyboardInterrupt:
             self.fail("Test Interrupted !")
 
+    def test_service_serialized(self):
+        try:
+            self.logPoint()
+
+            rqst_type = self.echo_service.rostype_req
+            resp_type = self.echo_service.rostype_resp
+            buff = BytesIO()
+            rqst_type(request=self.test_message).serialize(buff)
+
+            print("calling : {msg} serialized on service {service}".format(msg=self.test_message, service=self.echo_service.name))
+            resp = self.echo_service.call_serialized(buff.getvalue(), md5sum=rqst_type._md5sum)
+            assert_equal(resp['type'], resp_type._type)
+            assert_equal(resp['md5sum'], resp_type._md5sum)
+            assert_equal(resp_type().deserialize(resp['data']).response, self.test_message)
+
+        except KeyboardInterrupt:
+            self.fail("Test Interrupted !")
+
     #TODO
     # def test_slow_service_timeout(self):
     #
@@ -14,7 +14,9 @@ current_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 sys.path.insert(1, current_path)  # sys.path[0] is always current path as per python spec
 
 # Unit test import ( will emulate ROS setup if needed )
+import threading
 import time
+from io import BytesIO
 
 from pyros_interfaces_ros.publisher_if import PublisherBack
 from pyros_interfaces_ros.message_conversion import get_msg, get_msg_dict, populate_instance, extract_values, FieldTypeMismatchException
@@ -148,7 +150,8 @@ class TestStringPublisher(unittest.TestCase):
             assert_true(pub_topic_class == std_msgs.String)
             self.pub_if = PublisherBack(self.pub_topic_name, pub_topic_type)
 
-            # Making sure the topic interface is ready to be used just after creation
+            # Making sure the topic interface is ready to be used as soon as it is connected
+            assert_true(self.pub_if.wait_ready(timeout=1))
             # by checking number of connections on the actual publisher
             subs_connected = self.pub_topic.impl.get_num_connections()  # no local pub
             assert_true(subs_connected == 1)
@@ -167,9 +170,281 @@ class TestStringPublisher(unittest.TestCase):
             # We assert there is no difference
             assert_true(len(set(six.iteritems(msg)) ^ set(six.iteritems({'data': self.test_message}))) == 0)
 
+            # the snapshot gives us the same message with its sequence number
+            seq, msg = self.pub_if.snapshot()
+            assert_true(seq >= 1)
+            assert_equal(msg, {'data': self.test_message})
+
+        except KeyboardInterrupt:
+            self.fail("Test Interrupted !")
+
+
+    def test_publisher_batch(self):
+        try:
+            self.logPoint()
+
+            self.pub_topic = rospy.Publisher(self.pub_topic_name, std_msgs.String, queue_size=1)
+            pub_topic_type, pub_topic_class = self.topic_wait_type(self.pub_topic_name)
+
+            self.pub_if = PublisherBack(self.pub_topic_name, pub_topic_type, msg_queue_size=3, overflow='drop_newest')
+
+            # feeding the queue directly, as rospy would
+            for i in range(5):
+                self.pub_if.topic_callback(std_msgs.String(data=str(i)))
+
+            # the queue is full : the newest messages have been dropped
+            assert_equal(self.pub_if.dropped, 2)
+            assert_equal(self.pub_if.get_batch(2), [{'data': '0'}, {'data': '1'}])
+            assert_equal(self.pub_if.get_batch(), [{'data': '2'}])
+            assert_equal(self.pub_if.get_batch(), [])
+
+        except KeyboardInterrupt:
+            self.fail("Test Interrupted !")
+
+    def test_publisher_lazy(self):
+        try:
+            self.logPoint()
+
+            lazy_topic_name = '/testing/lazy_publisher'
+            self.lazy_topic = rospy.Publisher(lazy_topic_name, std_msgs.String, queue_size=1)
+            lazy_topic_type, lazy_topic_class = self.topic_wait_type(lazy_topic_name)
+
+            self.pub_if = PublisherBack(lazy_topic_name, lazy_topic_type, lazy=True)
+
+            # feeding the queue directly, as rospy would with an AnyMsg subscriber
+            buff = BytesIO()
+            std_msgs.String(data=self.test_message).serialize(buff)
+            anymsg = rospy.AnyMsg()
+            anymsg.deserialize(buff.getvalue())
+            self.pub_if.topic_callback(anymsg)
+
+            # not deserialized until we read it
+            assert_true(self.pub_if.msg[0]._inst is None)
+            assert_equal(self.pub_if.get(), {'data': self.test_message})
+            # and deserialized only once
+            inst = self.pub_if.msg[0]._inst
+            assert_true(isinstance(inst, std_msgs.String))
+            assert_equal(self.pub_if.get(), {'data': self.test_message})
+            assert_true(self.pub_if.msg[0]._inst is inst)
+
+        except KeyboardInterrupt:
+            self.fail("Test Interrupted !")
+
+    def test_publisher_lazy_and_not(self):
+        try:
+            self.logPoint()
+
+            mixed_topic_name = '/testing/mixed_publisher'
+            self.mixed_topic = rospy.Publisher(mixed_topic_name, std_msgs.String, queue_size=1)
+            mixed_topic_type, mixed_topic_class = self.topic_wait_type(mixed_topic_name)
+
+            # both interfaces share the rospy subscriber, created as lazy
+            lazy_if = PublisherBack(mixed_topic_name, mixed_topic_type, lazy=True)
+            self.pub_if = PublisherBack(mixed_topic_name, mixed_topic_type)
+            try:
+                assert_true(self.pub_if.topic is lazy_if.topic)
+
+                # the typed interface copes with the serialized messages rospy gives to the lazy subscriber
+                buff = BytesIO()
+                std_msgs.String(data=self.test_message).serialize(buff)
+                anymsg = rospy.AnyMsg()
+                anymsg.deserialize(buff.getvalue())
+                self.pub_if.topic_callback(anymsg)
+                assert_equal(self.pub_if.get(), {'data': self.test_message})
+            finally:
+                self.pub_if.cleanup()
+                lazy_if.cleanup()
+
+            # and the other way around
+            typed_if = PublisherBack(mixed_topic_name, mixed_topic_type)
+            self.pub_if = PublisherBack(mixed_topic_name, mixed_topic_type, lazy=True)
+            try:
+                assert_true(self.pub_if.topic is typed_if.topic)
+                # the lazy interface gets deserialized messages
+                self.pub_if.topic_callback(std_msgs.String(data=self.test_message))
+                assert_equal(self.pub_if.get(), {'data': self.test_message})
+            finally:
+                self.pub_if.cleanup()
+                typed_if.cleanup()
+
+        except KeyboardInterrupt:
+            self.fail("Test Interrupted !")
+
+    def test_publisher_get_cached(self):
+        try:
+            self.logPoint()
+
+            self.pub_topic = rospy.Publisher(self.pub_topic_name, std_msgs.String, queue_size=1)
+            pub_topic_type, pub_topic_class = self.topic_wait_type(self.pub_topic_name)
+
+            self.pub_if = PublisherBack(self.pub_topic_name, pub_topic_type)
+            self.pub_if.topic_callback(std_msgs.String(data=self.test_message))
+
+            # the same message is converted only once
+            msg = self.pub_if.get()
+            assert_equal(msg, {'data': self.test_message})
+            assert_true(self.pub_if.get() is msg)
+            # but once per conversion options
+            assert_equal(self.pub_if.get(fields=['data']), {'data': self.test_message})
+            assert_true(self.pub_if.get(fields=['data']) is not msg)
+            # selecting no field is not selecting all of them
+            self.pub_if.topic_callback(std_msgs.String(data=self.test_message))
+            assert_equal(self.pub_if.get(fields=[]), {})
+            assert_equal(self.pub_if.get(), {'data': self.test_message})
+
+            # a new message invalidates the cache
+            self.pub_if.topic_callback(std_msgs.String(data='other'))
+            assert_equal(self.pub_if.get(), {'data': 'other'})
+
+        except KeyboardInterrupt:
+            self.fail("Test Interrupted !")
+
+    def test_publisher_wait(self):
+        try:
+            self.logPoint()
+
+            self.pub_topic = rospy.Publisher(self.pub_topic_name, std_msgs.String, queue_size=1)
+            pub_topic_type, pub_topic_class = self.topic_wait_type(self.pub_topic_name)
+
+            self.pub_if = PublisherBack(self.pub_topic_name, pub_topic_type)
+
+            # nothing arrives
+            assert_true(self.pub_if.get(wait=True, timeout=0.1) is None)
+
+            self.pub_if.topic_callback(std_msgs.String(data=self.test_message))
+            seq, msg = self.pub_if.snapshot()
+            assert_equal(msg, {'data': self.test_message})
+            # nothing newer arrives
+            assert_true(self.pub_if.get(wait=True, timeout=0.1, after_seq=seq) is None)
+
+            # a message arrives while we wait
+            feeder = threading.Timer(0.1, self.pub_if.topic_callback, [std_msgs.String(data='newer')])
+            feeder.start()
+            assert_equal(self.pub_if.get(wait=True, timeout=5, after_seq=seq), {'data': 'newer'})
+            feeder.join()
+
+        except KeyboardInterrupt:
+            self.fail("Test Interrupted !")
+
+    def test_publisher_stream(self):
+        try:
+            self.logPoint()
+
+            self.pub_topic = rospy.Publisher(self.pub_topic_name, std_msgs.String, queue_size=1)
+            pub_topic_type, pub_topic_class = self.topic_wait_type(self.pub_topic_name)
+
+            self.pub_if = PublisherBack(self.pub_topic_name, pub_topic_type)
+            stream_id = self.pub_if.open_stream(max_size=3, flush_size=2, flush_interval=0.1)
+
+            # nothing arrives
+            assert_equal(self.pub_if.read_stream(stream_id, timeout=0.1), {'msgs': [], 'dropped': 0})
+
+            # a full batch is returned at once
+            for i in range(5):
+                self.pub_if.topic_callback(std_msgs.String(data=str(i)))
+            # the stream buffer is bounded, independently of the topic queue
+            assert_equal(self.pub_if.read_stream(stream_id, timeout=1), {'msgs': [{'data': '2'}, {'data': '3'}, {'data': '4'}], 'dropped': 2})
+
+            # a partial batch is returned after flush_interval
+            self.pub_if.topic_callback(std_msgs.String(data='5'))
+            assert_equal(self.pub_if.read_stream(stream_id, timeout=1), {'msgs': [{'data': '5'}], 'dropped': 0})
+
+            assert_true(self.pub_if.close_stream(stream_id))
+            assert_true(self.pub_if.read_stream(stream_id) is None)
+
+        except KeyboardInterrupt:
+            self.fail("Test Interrupted !")
+
+    def test_publisher_history(self):
+        try:
+            self.logPoint()
+
+            self.pub_topic = rospy.Publisher(self.pub_topic_name, std_msgs.String, queue_size=1)
+            pub_topic_type, pub_topic_class = self.topic_wait_type(self.pub_topic_name)
+
+            self.pub_if = PublisherBack(self.pub_topic_name, pub_topic_type, history_size=3, history_age=0.5)
+
+            for i in range(4):
+                self.pub_if.topic_callback(std_msgs.String(data=str(i)))
+            # bounded by count
+            hist = self.pub_if.get_history()
+            assert_equal(hist['msgs'], [{'data': '1'}, {'data': '2'}, {'data': '3'}])
+
+            time.sleep(0.2)
+            self.pub_if.topic_callback(std_msgs.String(data='4'))
+            assert_equal(self.pub_if.get_history(last=0.1)['msgs'], [{'data': '4'}])
+            assert_equal(self.pub_if.get_history(since=hist['stamps'][-1])['msgs'], [{'data': '4'}])
+
+            # bounded by age
+            time.sleep(0.4)
+            assert_equal(self.pub_if.get_history()['msgs'], [{'data': '4'}])
+
         except KeyboardInterrupt:
             self.fail("Test Interrupted !")
 
+    def test_publisher_transport(self):
+        try:
+            self.logPoint()
+
+            self.pub_topic = rospy.Publisher(self.pub_topic_name, std_msgs.String, queue_size=1)
+            pub_topic_type, pub_topic_class = self.topic_wait_type(self.pub_topic_name)
+
+            self.pub_if = PublisherBack(self.pub_topic_name, pub_topic_type, queue_size=2, buff_size=2 ** 20)
+            assert_equal(self.pub_if.asdict()['transport'], {'queue_size': 2, 'buff_size': 2 ** 20, 'tcp_nodelay': False})
+
+            # another interface on the same topic shares the rospy subscriber, which must satisfy both
+            other_if = PublisherBack(self.pub_topic_name, pub_topic_type, queue_size=1, buff_size=2 ** 10, tcp_nodelay=True)
+            try:
+                assert_equal(self.pub_if.asdict()['transport'], {'queue_size': 2, 'buff_size': 2 ** 20, 'tcp_nodelay': True})
+                assert_equal(other_if.asdict()['transport'], self.pub_if.asdict()['transport'])
+            finally:
+                other_if.cleanup()
+
+        except KeyboardInterrupt:
+            self.fail("Test Interrupted !")
+
+    def test_publisher_max_rate(self):
+        try:
+            self.logPoint()
+
+            self.pub_topic = rospy.Publisher(self.pub_topic_name, std_msgs.String, queue_size=1)
+            pub_topic_type, pub_topic_class = self.topic_wait_type(self.pub_topic_name)
+
+            self.pub_if = PublisherBack(self.pub_topic_name, pub_topic_type, msg_queue_size=10, max_rate=10)
+
+            for i in range(5):
+                self.pub_if.topic_callback(std_msgs.String(data=str(i)))
+            # above the rate, only the latest message is kept, and stored later
+            assert_equal(self.pub_if.unread(), 1)
+            time.sleep(0.2)
+            assert_equal(self.pub_if.get_batch(), [{'data': '0'}, {'data': '4'}])
+            assert_equal(self.pub_if.asdict()['throttled'], 3)
+
+        except KeyboardInterrupt:
+            self.fail("Test Interrupted !")
+
+    def test_publisher_serialized(self):
+        try:
+            self.logPoint()
+
+            self.pub_topic = rospy.Publisher(self.pub_topic_name, std_msgs.String, queue_size=1)
+            pub_topic_type, pub_topic_class = self.topic_wait_type(self.pub_topic_name)
+
+            self.pub_if = PublisherBack(self.pub_topic_name, pub_topic_type)
+            assert_true(self.pub_if.get_serialized() is None)
+
+            self.pub_if.topic_callback(std_msgs.String(data=self.test_message))
+
+            buff = BytesIO()
+            std_msgs.String(data=self.test_message).serialize(buff)
+            assert_equal(self.pub_if.get_serialized(), {
+                'type': 'std_msgs/String',
+                'md5sum': std_msgs.String._md5sum,
+                'data': buff.getvalue(),
+            })
+
+        except KeyboardInterrupt:
+            self.fail("Test Interrupted !")
 
 if __name__ == '__main__':
     print("ARGV : %r", sys.argv)
@@ -14,11 +14,13 @@ current_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 sys.path.insert(1, current_path)  # sys.path[0] is always current path as per python spec
 
 # Unit test import ( will emulate ROS setup if needed )
+import threading
 import time
 import Queue
+from io import BytesIO
 
 from pyros_interfaces_ros.subscriber_if import SubscriberBack
-from pyros_interfaces_ros.message_conversion import get_msg, get_msg_dict, populate_instance, extract_values, FieldTypeMismatchException
+from pyros_interfaces_ros.message_conversion import get_msg, get_msg_dict, populate_instance, extract_values, FieldTypeMismatchException, MD5SumMismatchException
 
 
 # ROS imports should now work from ROS or from python (without ROS env setup)
@@ -162,7 +164,8 @@ class TestStringSubscriber(unittest.TestCase):
             assert(sub_topic_class == std_msgs.String)
             self.sub_if = SubscriberBack(self.sub_topic_name, sub_topic_type)
 
-            # Making sure the topic interface is ready to be used just after creation
+            # Making sure the topic interface is ready to be used as soon as it is connected
+            assert_true(self.sub_if.wait_ready(timeout=1))
             # by checking the number of connections on the actual subscriber
             subs_connected = self.sub_topic.impl.get_num_connections()  # no local subs
             assert_true(subs_connected == 1)
@@ -179,6 +182,136 @@ class TestStringSubscriber(unittest.TestCase):
         except KeyboardInterrupt:
             self.fail("Test Interrupted !")
 
+    def test_subscriber_async(self):
+        try:
+            self.logPoint()
+
+            self.sub_topic = rospy.Subscriber(self.sub_topic_name, std_msgs.String, self.sub_cb)
+            sub_topic_type, sub_topic_class = self.topic_wait_type(self.sub_topic_name)
+
+            self.sub_if = SubscriberBack(self.sub_topic_name, sub_topic_type, async_queue_size=10)
+            try:
+                # conversion errors are still raised to the caller
+                with self.assertRaises(FieldTypeMismatchException):
+                    self.sub_if.publish({'data': 42})
+
+                print("sending : {msg} on topic {topic}".format(msg=self.test_message, topic=self.sub_if.name))
+                assert_true(self.sub_if.publish({'data': self.test_message}))
+
+                msg = self.msg_wait({'data': self.test_message}, self.sub_topic)
+                assert_equal(msg, {'data': self.test_message})
+                stats = self.sub_if.asdict()['async']
+                assert_equal(stats['published'], 1)
+                assert_equal(stats['dropped'], 0)
+            finally:
+                self.sub_if.cleanup()
+
+        except KeyboardInterrupt:
+            self.fail("Test Interrupted !")
+
+    def test_subscriber_publish_many(self):
+        try:
+            self.logPoint()
+
+            self.sub_topic = rospy.Subscriber(self.sub_topic_name, std_msgs.String, self.sub_cb)
+            sub_topic_type, sub_topic_class = self.topic_wait_type(self.sub_topic_name)
+
+            self.sub_if = SubscriberBack(self.sub_topic_name, sub_topic_type)
+            assert_true(self.sub_if.wait_ready(timeout=1))
+
+            # one invalid message prevents publishing any
+            with self.assertRaises(FieldTypeMismatchException):
+                self.sub_if.publish_many([{'data': 'first'}, {'data': 42}])
+
+            start = time.time()
+            assert_equal(self.sub_if.publish_many([{'data': 'first'}, {'data': self.test_message}], rate=10), 2)
+            assert_true(time.time() - start >= 0.1)
+
+            msg = self.msg_wait({'data': self.test_message}, self.sub_topic)
+            assert_equal(msg, {'data': self.test_message})
+
+        except KeyboardInterrupt:
+            self.fail("Test Interrupted !")
+
+    def test_subscriber_publish_many_async_drop(self):
+        try:
+            self.logPoint()
+
+            self.sub_topic = rospy.Subscriber(self.sub_topic_name, std_msgs.String, self.sub_cb)
+            sub_topic_type, sub_topic_class = self.topic_wait_type(self.sub_topic_name)
+
+            self.sub_if = SubscriberBack(self.sub_topic_name, sub_topic_type, async_queue_size=1, async_overflow='drop_newest')
+            try:
+                # stalling the publishing thread on the first message
+                unblock = threading.Event()
+                self.sub_if.async_queue.publish = lambda msg: unblock.wait()
+                assert_equal(self.sub_if.publish_many([{'data': 'first'}]), 1)
+                while self.sub_if.async_queue.queue:
+                    time.sleep(0.01)
+
+                # only one more message fits in the queue, the others are dropped, and not counted
+                assert_equal(self.sub_if.publish_many([{'data': str(i)} for i in range(3)]), 1)
+                assert_equal(self.sub_if.asdict()['async']['dropped'], 2)
+                unblock.set()
+            finally:
+                self.sub_if.cleanup()
+
+        except KeyboardInterrupt:
+            self.fail("Test Interrupted !")
+
+    def test_subscriber_transport(self):
+        try:
+            self.logPoint()
+
+            latched_topic_name = '/testing/latched_subscriber'
+            self.sub_if = SubscriberBack(latched_topic_name, 'std_msgs/String', queue_size=5)
+            try:
+                assert_equal(self.sub_if.asdict()['transport'], {'queue_size': 5, 'latch': False, 'tcp_nodelay': False})
+
+                # another interface on the same topic shares the rospy publisher, which must satisfy both
+                other_if = SubscriberBack(latched_topic_name, 'std_msgs/String', queue_size=2, latch=True, tcp_nodelay=True)
+                try:
+                    assert_equal(self.sub_if.asdict()['transport'], {'queue_size': 5, 'latch': True, 'tcp_nodelay': True})
+                    assert_equal(other_if.asdict()['transport'], self.sub_if.asdict()['transport'])
+
+                    assert_true(self.sub_if.publish({'data': self.test_message}))
+                    # a late subscriber still gets the latched message
+                    self.sub_topic = rospy.Subscriber(latched_topic_name, std_msgs.String, self.sub_cb)
+                    msg = self.msg_wait({'data': self.test_message}, self.sub_topic)
+                    assert_equal(msg, {'data': self.test_message})
+                finally:
+                    other_if.cleanup()
+            finally:
+                self.sub_if.cleanup()
+
+        except KeyboardInterrupt:
+            self.fail("Test Interrupted !")
+
+    def test_subscriber_serialized(self):
+        try:
+            self.logPoint()
+
+            self.sub_topic = rospy.Subscriber(self.sub_topic_name, std_msgs.String, self.sub_cb)
+            sub_topic_type, sub_topic_class = self.topic_wait_type(self.sub_topic_name)
+
+            self.sub_if = SubscriberBack(self.sub_topic_name, sub_topic_type)
+            assert_true(self.sub_if.wait_ready(timeout=1))
+
+            buff = BytesIO()
+            std_msgs.String(data=self.test_message).serialize(buff)
+            # serialized data for another type is refused
+            with self.assertRaises(MD5SumMismatchException):
+                self.sub_if.publish_serialized(buff.getvalue(), md5sum='0' * 32)
+
+            print("sending : {msg} serialized on topic {topic}".format(msg=self.test_message, topic=self.sub_if.name))
+            assert_true(self.sub_if.publish_serialized(buff.getvalue(), md5sum=std_msgs.String._md5sum))
+
+            msg = self.msg_wait({'data': self.test_message}, self.sub_topic)
+            assert_equal(msg, {'data': self.test_message})
+
+        except KeyboardInterrupt:
+            self.fail("Test Interrupted !")
+
 
 if __name__ == '__main__':
     print("ARGV : %r", sys.argv)
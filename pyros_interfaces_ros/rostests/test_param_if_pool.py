@@ -176,6 +176,54 @@ class TestRosParamIfPool(unittest.TestCase):
         # param backend has been removed
         self.assertTrue(paramname not in self.param_if_pool.params.keys())
 
+    def test_param_getval_cached(self):
+        """
+        Test param value is served from the param cache, and updated on change.
+        :return:
+        """
+
+        paramname = '/test/cached_param'
+        rospy.set_param(paramname, 'value')
+        dt = self.param_if_pool.expose_transients_regex([paramname])
+
+        with Timeout(5) as t:
+            while not t.timed_out and paramname not in dt.added:
+                params = self.get_system_state()
+                dt = self.param_if_pool.update(params)
+                time.sleep(0.1)  # to avoid spinning out of control
+
+        self.assertTrue(not t.timed_out)
+        prm = self.param_if_pool.params[paramname]
+        self.assertEqual(prm.getval(), 'value')
+
+        # change from outside : the master notifies us
+        rospy.set_param(paramname, 'other value')
+        with Timeout(5) as t:
+            while not t.timed_out and prm.getval() != 'other value':
+                time.sleep(0.1)
+        self.assertTrue(not t.timed_out)
+
+        # change from the interface : the cache is updated immediately
+        prm.setval('our value')
+        self.assertEqual(prm.getval(), 'our value')
+
+        # cleaning up
+        self.param_if_pool.expose_params([])
+        rospy.delete_param(paramname)
+
+    def test_param_names_period(self):
+        """
+        Test param names are retrieved from the master only once per period.
+        :return:
+        """
+        pool = RosParamIfPool(names_update_period=60)
+        names = pool.get_param_names()
+        rospy.set_param('/test/late_param', 'value')
+        # still the same names, until the period elapses
+        self.assertTrue(pool.get_param_names() is names)
+        self.assertTrue('/test/late_param' in pool.get_param_names(force=True))
+        rospy.delete_param('/test/late_param')
+
     def test_param_appear_update_expose(self):
         """
         Test param exposing functionality for a param which already exists in
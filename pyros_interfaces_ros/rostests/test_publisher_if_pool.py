@@ -626,6 +626,20 @@ class TestRosInterface1NoCache(TestRosPublisherIfPool):
         self.publisher_if_pool = None
 
 
+# Same tests, building the transients in parallel
+@nose.tools.istest
+class TestRosInterface1NoCacheParallel(TestRosInterface1NoCache):
+
+    def setUp(self):
+        super(TestRosInterface1NoCacheParallel, self).setUp()
+        self.publisher_if_pool = RosPublisherIfPool(max_workers=4)
+
+    def tearDown(self):
+        # the worker threads must not outlive the pool
+        self.publisher_if_pool.stop()
+        super(TestRosInterface1NoCacheParallel, self).tearDown()
+
+
 # Testing with Connection Cache
 @nose.tools.istest
 class TestRosInterfaceCache(TestRosPublisherIfPool):
@@ -2,13 +2,21 @@ from __future__ import absolute_import
 
 from collections import OrderedDict
 from importlib import import_module
+import logging
 
 import roslib
 
 from .api import rospy_safe as rospy
-from .message_conversion import get_msg, get_msg_dict, populate_instance, extract_values, FieldTypeMismatchException, NonexistentFieldException
+from .message_conversion import get_msg, get_msg_dict, get_msg_pool, get_serialized_class, get_serialized_srv_class, populate_instance, extract_values, FieldTypeMismatchException, NonexistentFieldException, MD5SumMismatchException
 from pyros_interfaces_common.transient_if import TransientIf
 
+from .type_cache import get_type_cache
+
+# create logger
+_logger = logging.getLogger(__name__)
+# and let it propagate to parent logger, or other handler
+# the user of pyros should configure handlers
+
 
 # outputs message structure as string (useful ?)
 def get_service_srv(service):
@@ -55,13 +63,24 @@ class ServiceBack(TransientIf):
         self.rostype_req = getattr(srv_module, service_type_name + 'Request')
         self.rostype_resp = getattr(srv_module, service_type_name + 'Response')
 
-        self.srvtype = get_service_srv_dict(self)
+        self.srvtype = tuple(
+            dict(zip(msg_class.__slots__, msg_class._slot_types))
+            for msg_class in (self.rostype_req, self.rostype_resp)
+        )
+        # refreshing the type descriptors on disk, for the processes describing this type later.
+        # This is optional, it must not prevent interfacing the service.
+        try:
+            get_type_cache().get_srv(self.rostype)
+        except Exception as e:
+            _logger.warning("Cannot store the descriptor of {type} in the type cache : {e}".format(type=service_type, e=e))
 
         rospy.loginfo(
             rospy.get_name() + " Pyros.ros : Adding service interface {name} {typename}".format(
                 name=self.name, typename=self.rostype_name))
 
         self.proxy = rospy.ServiceProxy(self.name, self.rostype)
+        # created on first call_serialized()
+        self.serialized_proxy = None
 
     def cleanup(self):
 
@@ -83,21 +102,20 @@ class ServiceBack(TransientIf):
             'name': self.name,
             'fullname': self.name,  # for BWcompat
             'rostype_name': self.rostype_name,
+            'rostype_req_md5sum': self.rostype_req._md5sum,
+            'rostype_resp_md5sum': self.rostype_resp._md5sum,
             'srvtype': self.srvtype,
         })
 
     def call(self, rosreq_content=None):
+        # requests are serialized during the call, so their instances can be reused afterwards
+        pool = get_msg_pool(self.rostype_req)
+        rqst = pool.get()
         try:
-            rqst = self.rostype_req()
-            populate_instance(rosreq_content, rqst)
+            populate_instance(rosreq_content, rqst, reset=True)
 
-            fields = []
-            if rosreq_content:
-                for slot in rqst.__slots__:
-                    fields.append(getattr(rqst, slot))
-                fields = tuple(fields)
-
-            resp = self.proxy(*fields)
+            # rospy takes the request instance as it is
+            resp = self.proxy(rqst)
             resp_content = extract_values(resp)
 
             return resp_content
@@ -112,5 +130,25 @@ class ServiceBack(TransientIf):
         except NonexistentFieldException as e:
             rospy.logerr("[{name}] : non existent field {e}".format(name=__name__, e=e))
             raise
+        finally:
+            pool.put(rqst)
 
-
+    def call_serialized(self, data, md5sum=None):
+        """
+        Calls the service with a ROS serialized request, and returns the serialized response, without any conversion.
+        :param data: the serialized request
+        :param md5sum: the md5sum of the request type data was serialized with. None skips the check.
+        :return: a dict {'type': type name, 'md5sum': md5sum, 'data': serialized bytes} for the response
+        """
+        if md5sum is not None and md5sum != self.rostype_req._md5sum:
+            raise MD5SumMismatchException(self.rostype_req._type, self.rostype_req._md5sum, md5sum)
+        if self.serialized_proxy is None:
+            self.serialized_proxy = rospy.ServiceProxy(self.name, get_serialized_srv_class(self.rostype))
+        rqst = get_serialized_class(self.rostype_req)()
+        rqst._buff = data
+        try:
+            resp = self.serialized_proxy(rqst)
+        except rospy.ServiceException as e:
+            rospy.logerr("[{name}] : service exception {e}".format(name=__name__, e=e))
+            raise
+        return {'type': self.rostype_resp._type, 'md5sum': self.rostype_resp._md5sum, 'data': resp._buff}
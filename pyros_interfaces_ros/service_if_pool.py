@@ -1,7 +1,6 @@
 from __future__ import absolute_import
 
 import logging
-from itertools import ifilter
 
 import rosservice
 
@@ -12,9 +11,12 @@ _logger = logging.getLogger(__name__)
 # and let it propagate to parent logger, or other handler
 # the user of pyros should configure handlers
 
-from pyros_interfaces_common.transient_if_pool import TransientIfPool
+from pyros_interfaces_common.transient_if_pool import TransientIfPool, DiffTuple
+
+from .parallel_if_pool import ParallelTransientIfPool
 
 from .service_if import ServiceBack, ServiceTuple
+from .util import type_index
 
 try:
     import rocon_python_comms
@@ -22,14 +24,14 @@ except ImportError:
     rocon_python_comms = None
 
 
-class RosServiceIfPool(TransientIfPool):
+class RosServiceIfPool(ParallelTransientIfPool):
 
     """
     MockInterface.
     """
-    def __init__(self, services=None):
+    def __init__(self, services=None, max_workers=None):
         # This base constructor assumes the system to interface with is already available ( can do a get_svc_available() )
-        super(RosServiceIfPool, self).__init__(services, transients_desc="services")
+        super(RosServiceIfPool, self).__init__(services, transients_desc="services", max_workers=max_workers)
 
     def get_transients_available(self):  # function returning all services available on the system
         return self.available
@@ -100,10 +102,10 @@ class RosServiceIfPool(TransientIfPool):
         :param service_types:
         :return:
         """
+        service_types = type_index(service_types)
         self.available = dict()
         for s in services:  # We assume s[1] is never empty here
-            st = next(ifilter(lambda lst: s[0] == lst[0], service_types), [])
-            stp = ServiceTuple(name=s[0], type=st[1] if len(st) > 0 else None)
+            stp = ServiceTuple(name=s[0], type=service_types.get(s[0]))
             self.available[stp.name] = stp
 
         # We still need to return DiffTuples
@@ -117,9 +119,10 @@ class RosServiceIfPool(TransientIfPool):
         :param subscribers_dt:
         :return:
         """
+        service_types_added = type_index(service_types_dt.added)
+        service_types_removed = type_index(service_types_dt.removed)
         for s in services_dt.added:
-            st = next(ifilter(lambda lst: s[0] == lst[0], service_types_dt.added), [])
-            stp = ServiceTuple(name=s[0], type=st[1] if len(st) > 0 else None)
+            stp = ServiceTuple(name=s[0], type=service_types_added.get(s[0]))
             if stp.name in self.available:
                 if self.available[stp.name].type is None and stp.type is not None:
                     self.available[stp.name].type = stp.type
@@ -127,8 +130,7 @@ class RosServiceIfPool(TransientIfPool):
                 self.available[stp.name] = stp
 
         for s in services_dt.removed:
-            st = next(ifilter(lambda lst: s[0] == lst[0], service_types_dt.removed), [])
-            stp = ServiceTuple(name=s[0], type=st[1] if len(st) > 0 else None)
+            stp = ServiceTuple(name=s[0], type=service_types_removed.get(s[0]))
             if stp.name in self.available:
                 self.available.pop(stp.name, None)
 
@@ -139,7 +141,7 @@ class RosServiceIfPool(TransientIfPool):
     # Not working yet... need to solve multiprocess profiling issues...
     # @profile
     def update_delta(self, services_dt, service_types_dt=None):
-        services_dt = self.compute_state(services_dt, service_types_dt or [])
+        services_dt = self.compute_state(services_dt, service_types_dt or DiffTuple([], []))
 
         if services_dt.added or services_dt.removed:
             _logger.debug(
@@ -1,21 +1,125 @@
 from __future__ import absolute_import
 
+import threading
 import time
 
 import roslib
 import rospy
+from rospy.impl.tcpros import get_tcpros_handler
 
 from importlib import import_module
 from collections import deque, OrderedDict
 
 
-from .message_conversion import get_msg, get_msg_dict, populate_instance, extract_values, FieldTypeMismatchException
+from .message_conversion import get_msg, get_msg_dict, get_msg_pool, get_serialized_class, populate_instance, extract_values, FieldTypeMismatchException, MD5SumMismatchException
 from .poolparam import PoolParam
+from .publisher_if import DROP_OLDEST, DROP_NEWEST
+from .throttle import Throttle
 from .topicbase import TopicBase
+from .util import monotonic
 
 
-class SubscriberBackTimeout(Exception):
-    pass
+def _reconcile_publisher(impl, queue_size=None, latch=False, tcp_nodelay=False, **kwargs):
+    """
+    Adapts the shared rospy publisher implementation when another interface reuses it,
+    so it satisfies all of them : the biggest queue, latched and no delay if one asks for it.
+    """
+    # 0 is unbounded for rospy, None is synchronous publishing : we keep what is there
+    if queue_size is not None and impl.queue_size is not None and impl.queue_size != 0 and (queue_size == 0 or queue_size > impl.queue_size):
+        impl.set_queue_size(queue_size)  # applies to new connections only
+    if latch and not impl.is_latch:
+        impl.enable_latch()
+    if tcp_nodelay:
+        get_tcpros_handler().set_tcp_nodelay(impl.resolved_name, True)  # applies to new connections only
+
+
+class PublishQueue(object):
+    """
+    PublishQueue publishes messages from a background thread, in order, so callers do not wait for rospy.
+    The queue is bounded by max_size, and messages dropped when it is full are counted.
+    """
+
+    def __init__(self, name, publish, max_size=100, overflow=DROP_OLDEST):
+        """
+        :param name: the name of the topic, to name the thread
+        :param publish: the function publishing one message
+        """
+        if overflow not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError("overflow policy must be {0} or {1}, not {2}".format(DROP_OLDEST, DROP_NEWEST, overflow))
+        self.publish = publish
+        self.max_size = max_size
+        self.overflow = overflow
+
+        # (time queued, msg), oldest on the left
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.dropped = 0
+        self.published = 0
+        # time between queueing and publishing, in seconds
+        self.latency_last = None
+        self.latency_max = 0.0
+        self._latency_total = 0.0
+        self._stopped = False
+
+        self._thread = threading.Thread(target=self._run, name="pyros publish " + name)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def put(self, msg):
+        """
+        Queues a message to publish.
+        :return: False if the message was dropped because the queue is full
+        """
+        with self.cond:
+            if len(self.queue) >= self.max_size:
+                self.dropped += 1
+                if self.overflow == DROP_NEWEST:
+                    return False
+                self.queue.popleft()
+            self.queue.append((monotonic(), msg))
+            self.cond.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.queue and not self._stopped:
+                    self.cond.wait()
+                if self._stopped:
+                    return
+                queued, msg = self.queue.popleft()
+            try:
+                self.publish(msg)
+            except Exception as e:  # nobody is there to catch it, in this thread
+                rospy.logerr("[{name}] : publishing failed {e}".format(name=__name__, e=e))
+                continue
+            latency = monotonic() - queued
+            self.published += 1
+            self.latency_last = latency
+            self.latency_max = max(self.latency_max, latency)
+            self._latency_total += latency
+
+    def stop(self):
+        """
+        Stops the worker thread. Messages still queued are dropped.
+        """
+        with self.cond:
+            self._stopped = True
+            self.dropped += len(self.queue)
+            self.queue.clear()
+            self.cond.notify_all()
+
+    def asdict(self):
+        return {
+            'queued': len(self.queue),
+            'dropped': self.dropped,
+            'published': self.published,
+            'latency': {
+                'last': self.latency_last,
+                'max': self.latency_max,
+                'mean': self._latency_total / self.published if self.published else None,
+            },
+        }
 
 
 class SubscriberBack(TopicBase):
@@ -36,9 +140,9 @@ class SubscriberBack(TopicBase):
     # if we previously stopped publishing / subscribing to this topic
     # usually the count will be just 1, but more is possible during tests
 
-    pool = PoolParam(rospy.Publisher, "publishers")
+    pool = PoolParam(rospy.Publisher, "publishers", reconcile=_reconcile_publisher)
 
-    def __init__(self, topic_name, topic_type):
+    def __init__(self, topic_name, topic_type, ready_timeout=1, binary=False, max_rate=None, async_queue_size=0, async_overflow=DROP_OLDEST, queue_size=1, latch=False, tcp_nodelay=False, reuse_msgs=False):
 
         super(SubscriberBack, self).__init__(topic_name, topic_type)
         # Is 1 a good choice ? # TODO : check which value is best here...
@@ -47,19 +151,24 @@ class SubscriberBack(TopicBase):
             rospy.get_name() + " Pyros.ros : Adding publisher interface {name} {typename}".format(
                 name=self.name, typename=self.rostype))
 
-        self.topic = self.pool.acquire(self.name, self.rostype, queue_size=1)
+        # whether binary fields are expected as raw bytes by default, instead of base64
+        self.binary = binary
+        # limits the rate of messages published, keeping the latest one. None publishes all of them.
+        self.throttle = Throttle(max_rate) if max_rate else None
+        # publishing from a background thread, so callers return once the message is converted. 0 publishes in the caller thread.
+        self.async_queue = PublishQueue(self.name, self._send_now, async_queue_size, async_overflow) if async_queue_size else None
+        # reusing message instances once published, instead of allocating one per message.
+        # The message returned by publish() may then be overwritten by a later one.
+        self.msg_pool = get_msg_pool(self.rostype) if reuse_msgs else None
+
+        self.topic = self.pool.acquire(self.name, self.rostype, queue_size=queue_size, latch=latch, tcp_nodelay=tcp_nodelay)
         # CAREFUL ROS publisher doesnt guarantee messages to be delivered
         # stream-like design spec -> loss is acceptable.
 
-        # Make sure we get at least one connection before returning
-        start = time.time()
-        timeout = 1
-        while time.time() - start < timeout and len(self.pool.get_impl_connections(self.name)) < 1:
-            # print("publishers connected : {0}".format(self.pool.get_impl_connections(self.name)))
-            time.sleep(0.2)
-
-        if self.pool.get_impl_connections(self.name) < 1:
-            raise SubscriberBackTimeout
+        # We do not wait for a connection here, to not block the caller.
+        # Instead the first messages published wait for a connection, until ready_timeout after creation.
+        self._ready_deadline = time.time() + ready_timeout
+        self.pool.add_connection_callback(self.name, self._on_connection)
 
     def cleanup(self):
         """
@@ -71,6 +180,10 @@ class SubscriberBack(TopicBase):
             rospy.get_name() + " Pyros.ros : Removing publisher interface {name} {typename}".format(
                 name=self.name, typename=self.rostype))
 
+        if self.throttle is not None:
+            self.throttle.cancel()
+        if self.async_queue is not None:
+            self.async_queue.stop()
         self.pool.release(self.topic)
 
         super(SubscriberBack, self).cleanup()
@@ -84,24 +197,137 @@ class SubscriberBack(TopicBase):
         """
         d = super(SubscriberBack, self). asdict()
         d['subscribers'] = self.topic.impl.get_stats_info()
+        # effective settings, the rospy implementation being shared between interfaces on the same topic
+        d['transport'] = {
+            'queue_size': self.topic.impl.queue_size,
+            'latch': self.topic.impl.is_latch,
+            'tcp_nodelay': get_tcpros_handler().get_tcp_nodelay(self.name),
+        }
+        if self.throttle is not None:
+            d['throttled'] = self.throttle.dropped
+        if self.async_queue is not None:
+            d['async'] = self.async_queue.asdict()
         return d
 
-    def publish(self, msg_content):
+    def _wait_ready(self):
+        if not self.ready.is_set():
+            # messages published before any subscriber connects would be lost
+            remaining = self._ready_deadline - time.time()
+            if remaining > 0:
+                self.ready.wait(remaining)
+
+    def publish(self, msg_content, binary=None):
         """
         Publishes a message to the topic
-        :return the actual message sent if one was sent, None if message couldn't be sent.
+        :param binary: whether binary fields are passed as raw bytes. None uses the topic setting.
+        :return the actual message sent if one was sent, None if message couldn't be sent,
+                or is delayed to respect the topic max_rate, or dropped because the async queue is full.
         """
+        if self.throttle is not None:
+            # above the rate, the message is not even converted
+            return self.throttle(self._publish, msg_content, binary)[1]
+        return self._publish(msg_content, binary)
+
+    def _publish(self, msg_content, binary=None):
+        msg = self._convert(msg_content, binary)
+        if isinstance(msg, self.rostype) and self._send(msg):
+            return msg  # because the return spec of rospy's publish is not consistent
+        return None
+
+    def _convert(self, msg_content, binary=None):
         # enforcing correct type to make send / receive symmetric and API less magical
         # Doing message conversion visibly in code before sending into the black magic tunnel sounds like a good idea
         try:
-            msg = self.rostype()
-            populate_instance(msg_content, msg)
-            if isinstance(msg, self.rostype):
-                self.topic.publish(msg)  # This should return False if publisher not fully setup yet
-                return msg  # because the return spec of rospy's publish is not consistent
+            if self.msg_pool is not None:
+                msg = self.msg_pool.get()
+                populate_instance(msg_content, msg, binary=self.binary if binary is None else binary, reset=True)
+            else:
+                msg = self.rostype()
+                populate_instance(msg_content, msg, binary=self.binary if binary is None else binary)
+            return msg
         except FieldTypeMismatchException as e:
             rospy.logerr("[{name}] : field type mismatch {e}".format(name=__name__, e=e))
             raise
             # TODO : reraise a topic exception ?
-        return None
 
+    def publish_many(self, msgs_content, rate=None, binary=None):
+        """
+        Publishes a list of messages to the topic, in order.
+        All messages are converted before the first one is published, so an invalid message prevents publishing any.
+        :param rate: the rate to publish messages at, in Hz. None publishes them all at once.
+        :param binary: whether binary fields are passed as raw bytes. None uses the topic setting.
+        :return the number of messages published, without those delayed or dropped to respect the topic max_rate,
+                or dropped because the async queue is full.
+        """
+        return publish_batch({self: msgs_content}, rate=rate, binary=binary)[self]
+
+    def publish_serialized(self, data, md5sum=None):
+        """
+        Publishes ROS serialized data to the topic, without any conversion.
+        :param data: the serialized message, as returned by PublisherBack.get_serialized()['data']
+        :param md5sum: the md5sum of the type data was serialized with. None skips the check.
+        :return True if the message was sent, False if it is delayed to respect the topic max_rate,
+                or dropped because the async queue is full.
+        """
+        if md5sum is not None and md5sum != self.rostype._md5sum:
+            raise MD5SumMismatchException(self.rostype._type, self.rostype._md5sum, md5sum)
+        if self.throttle is not None:
+            run, sent = self.throttle(self._publish_serialized, data)
+            return run and sent
+        return self._publish_serialized(data)
+
+    def _publish_serialized(self, data):
+        msg = get_serialized_class(self.rostype)()
+        msg._buff = data
+        return self._send(msg)
+
+    def _send_throttled(self, msg):
+        """
+        Sends an already converted message, respecting the topic max_rate.
+        :return True if the message was sent, False if it is delayed, or dropped because the async queue is full
+        """
+        if self.throttle is not None:
+            run, sent = self.throttle(self._send, msg)
+            return run and sent
+        return self._send(msg)
+
+    def _send(self, msg):
+        """
+        :return True if the message was sent, or queued to be sent. False if the async queue dropped it.
+        """
+        if self.async_queue is not None:
+            return self.async_queue.put(msg)
+        self._send_now(msg)
+        return True
+
+    def _send_now(self, msg):
+        self._wait_ready()
+        self.topic.publish(msg)  # This should return False if publisher not fully setup yet
+        # rospy serialized the message already, unless it keeps it to send to late subscribers
+        if self.msg_pool is not None and type(msg) is self.rostype and not self.topic.impl.is_latch:
+            self.msg_pool.put(msg)
+
+
+def publish_batch(batch, rate=None, binary=None):
+    """
+    Publishes lists of messages to multiple topics.
+    All messages are converted before the first one is published, so an invalid message prevents publishing any.
+    :param batch: a dict {SubscriberBack: [msg_content, ...]}
+    :param rate: the rate to publish messages at, in Hz. Messages at the same index in each list are published together.
+                 None publishes them all at once.
+    :param binary: whether binary fields are passed as raw bytes. None uses each topic setting.
+    :return: a dict {SubscriberBack: number of messages published}
+    """
+    msgs = dict((sub, [sub._convert(c, binary) for c in msgs_content]) for sub, msgs_content in batch.items())
+    published = dict((sub, 0) for sub in msgs)
+
+    start = time.time()
+    for i in range(max([len(m) for m in msgs.values()] or [0])):
+        if rate and i:
+            delay = start + i / float(rate) - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        for sub, sub_msgs in msgs.items():
+            if i < len(sub_msgs) and sub._send_throttled(sub_msgs[i]):
+                published[sub] += 1
+    return published
@@ -1,6 +1,5 @@
 from __future__ import absolute_import
 
-from itertools import ifilter
 import logging
 
 import rospy
@@ -13,7 +12,10 @@ _logger = logging.getLogger(__name__)
 
 from pyros_interfaces_common.transient_if_pool import TransientIfPool, DiffTuple
 
+from .parallel_if_pool import ParallelTransientIfPool
+
 from .topicbase import TopicTuple
+from .util import type_index, regex_options
 from .subscriber_if import SubscriberBack
 from .publisher_if import PublisherBack
 
@@ -23,15 +25,17 @@ except ImportError:
     rocon_python_comms = None
 
 
-class RosSubscriberIfPool(TransientIfPool):
+class RosSubscriberIfPool(ParallelTransientIfPool):
 
     """
     MockInterface.
     """
-    def __init__(self, subscribers=None):
+    def __init__(self, subscribers=None, max_workers=None, options=None):
+        #: options for the subscriber interfaces, as a dict {topic regex: SubscriberBack keyword arguments}
+        self.options = options or {}
         # This base constructor assumes the system to interface with is already available ( can do a get_svc_available() )
         # CAREFUL subscriber interfaces are publishers
-        super(RosSubscriberIfPool, self).__init__(subscribers, transients_desc="publishers")
+        super(RosSubscriberIfPool, self).__init__(subscribers, transients_desc="publishers", max_workers=max_workers)
 
     def get_transients_available(self):  # function returning all services available on the system
         return self.available
@@ -51,7 +55,9 @@ class RosSubscriberIfPool(TransientIfPool):
             return None
 
     def TransientMaker(self, topic_name, topic_type, *args, **kwargs):  # the service class implementation
-        return SubscriberBack(topic_name, topic_type, *args, **kwargs)
+        options = regex_options(topic_name, self.options)
+        options.update(kwargs)
+        return SubscriberBack(topic_name, topic_type, *args, **options)
 
     def TransientCleaner(self, subscriber):  # the topic class cleanup implementation
         return subscriber.cleanup()
@@ -100,10 +106,10 @@ class RosSubscriberIfPool(TransientIfPool):
         :return: a Difftuple, suitable to pass directly to
         """
 
+        topic_types = type_index(topic_types)
         self.available = dict()
         for s in subscribers:  # we assume t[1] is never empty here
-            tt = next(ifilter(lambda ltt: s[0] == ltt[0], topic_types), [])
-            ttp = TopicTuple(name=s[0], type=tt[1] if len(tt) > 0 else None, endpoints=set(s[1]))
+            ttp = TopicTuple(name=s[0], type=topic_types.get(s[0]), endpoints=set(s[1]))
             self.available[ttp.name] = ttp
 
         return subscribers
@@ -134,10 +140,11 @@ class RosSubscriberIfPool(TransientIfPool):
             removed=[[k, v] for k, v in removed_subs.iteritems()]
         )
         computed_subscribers_dt = DiffTuple([], [])
+        topic_types_added = type_index(topic_types_dt.added)
+        topic_types_removed = type_index(topic_types_dt.removed)
         _logger.debug("removed_subs_dt : {subscribers_dt}".format(**locals()))
         for t in subscribers_dt.added:
-            tt = next(ifilter(lambda ltt: t[0] == ltt[0], topic_types_dt.added), [])
-            ttp = TopicTuple(name=t[0], type=tt[1] if len(tt) > 0 else None, endpoints=set(t[1]))
+            ttp = TopicTuple(name=t[0], type=topic_types_added.get(t[0]), endpoints=set(t[1]))
             if ttp.name in self.available:
                 # if already available, we only update the endpoints list
                 self.available[ttp.name].endpoints |= ttp.endpoints
@@ -147,8 +154,7 @@ class RosSubscriberIfPool(TransientIfPool):
                 computed_subscribers_dt.added.append(t[0])
 
         for t in subscribers_dt.removed:
-            tt = next(ifilter(lambda ltt: t[0] == ltt[0], topic_types_dt.removed), [])
-            ttp = TopicTuple(name=t[0], type=tt[1] if len(tt) > 0 else None, endpoints=set(t[1]))
+            ttp = TopicTuple(name=t[0], type=topic_types_removed.get(t[0]), endpoints=set(t[1]))
             if ttp.name in self.available:
                 self.available[ttp.name].endpoints -= ttp.endpoints
                 if not self.available[ttp.name].endpoints:
@@ -245,7 +251,7 @@ class RosSubscriberIfPool(TransientIfPool):
         subscribers_namelist_dt = self.compute_state(DiffTuple(
             added=subscribers_dt_added,
             removed=subscribers_dt_removed
-        ), topic_types_dt or [])
+        ), topic_types_dt or DiffTuple([], []))
 
         if subscribers_namelist_dt.added or subscribers_namelist_dt.removed:
             _logger.debug(
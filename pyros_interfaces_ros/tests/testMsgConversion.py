@@ -23,6 +23,11 @@ import rospy
 import nose
 import pytest
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # Test all standard message
 import std_msgs.msg as std_msgs
 
@@ -42,6 +47,149 @@ def test_String_custom():
     assert val["data"] == "teststr2"
 
 
+def test_Float64MultiArray_nested():
+    msg = std_msgs.Float64MultiArray()
+    msgconv.populate_instance({
+        "layout": {"dim": [{"label": "x", "size": 3, "stride": 3}], "data_offset": 0},
+        "data": [1.0, 2.0, 3.5]
+    }, msg)
+    assert isinstance(msg.layout.dim[0], std_msgs.MultiArrayDimension)
+    val = msgconv.extract_values(msg)
+    assert val["layout"]["dim"] == [{"label": "x", "size": 3, "stride": 3}]
+    assert val["data"] == [1.0, 2.0, 3.5]
+
+
+def test_UInt8MultiArray_binary():
+    msg = std_msgs.UInt8MultiArray()
+    msgconv.populate_instance({"data": [0, 1, 2]}, msg)
+    val = msgconv.extract_values(msg)
+    assert val["data"] == "AAEC"  # base64 encoded
+
+
+def test_UInt8MultiArray_raw_binary():
+    msg = std_msgs.UInt8MultiArray()
+    msgconv.populate_instance({"data": bytearray(b"\x00\x01\x02")}, msg, binary=True)
+    assert msg.data == b"\x00\x01\x02"
+    # a string is taken as raw bytes, without trying to decode base64
+    msgconv.populate_instance({"data": b"AAEC"}, msg, binary=True)
+    assert msg.data == b"AAEC"
+    val = msgconv.extract_values(msg, binary=True)
+    assert val["data"] == b"AAEC"
+    assert msgconv.extract_values(msg)["data"] == "QUFFQw=="  # default stays base64
+
+
+def test_Float64MultiArray_projection():
+    msg = std_msgs.Float64MultiArray()
+    msgconv.populate_instance({
+        "layout": {"dim": [{"label": "x", "size": 3, "stride": 3}], "data_offset": 0},
+        "data": [1.0, 2.0, 3.5]
+    }, msg)
+    val = msgconv.extract_values(msg, fields=["layout.dim.label", "layout.data_offset"])
+    assert val == {"layout": {"dim": [{"label": "x"}], "data_offset": 0}}
+    # a field selected as a whole includes its subfields
+    val = msgconv.extract_values(msg, fields=["layout", "layout.dim.label"])
+    assert val == {"layout": {"dim": [{"label": "x", "size": 3, "stride": 3}], "data_offset": 0}}
+    # projection is compiled once per message class and fields
+    assert msgconv._get_projection_encoder(std_msgs.Float64MultiArray, frozenset(), ["data"]) is msgconv._get_projection_encoder(std_msgs.Float64MultiArray, frozenset(), ["data"])
+    with pytest.raises(msgconv.NonexistentFieldException):
+        msgconv.extract_values(msg, fields=["layout.nothing"])
+
+
+def test_projection_unregistered_class():
+    # like a srv request, or a generated class : it cannot be found by its type name
+    class Unregistered(std_msgs.String):
+        __slots__ = []
+        _type = 'pyros_test/Unregistered'
+    assert msgconv.extract_values(Unregistered(data="a"), fields=["data"]) == {"data": "a"}
+
+
+def test_projection_cache_bound():
+    max_size = msgconv._projection_encoders_max
+    msgconv._projection_encoders_max = 2
+    try:
+        data = msgconv._get_projection_encoder(std_msgs.Float64MultiArray, frozenset(), ["data"])
+        msgconv._get_projection_encoder(std_msgs.Float64MultiArray, frozenset(), ["layout"])
+        # data is used again, the oldest projection is now layout
+        assert msgconv._get_projection_encoder(std_msgs.Float64MultiArray, frozenset(), ["data"]) is data
+        msgconv._get_projection_encoder(std_msgs.Float64MultiArray, frozenset(), ["layout.dim"])
+        assert len(msgconv._projection_encoders) == 2
+        assert msgconv._get_projection_encoder(std_msgs.Float64MultiArray, frozenset(), ["data"]) is data
+    finally:
+        msgconv._projection_encoders_max = max_size
+
+
+def test_field_type_mismatch():
+    msg = std_msgs.Float64MultiArray()
+    with pytest.raises(msgconv.FieldTypeMismatchException):
+        msgconv.populate_instance({"data": ["not a float"]}, msg)
+
+
+def test_converters_cached():
+    msg = std_msgs.Float64MultiArray()
+    msgconv.extract_values(msg)
+    msgconv.populate_instance({"data": [4.2]}, msg)
+    # converters are compiled only once per message class
+    assert msgconv._get_msg_encoder(std_msgs.Float64MultiArray) is msgconv._get_msg_encoder(std_msgs.Float64MultiArray)
+    assert msgconv._get_msg_decoder(std_msgs.Float64MultiArray) is msgconv._get_msg_decoder(std_msgs.Float64MultiArray)
+
+
+def test_Float64MultiArray_numpy():
+    if numpy is None:
+        raise nose.SkipTest("numpy not found")
+    msg = std_msgs.Float64MultiArray()
+    msgconv.populate_instance({"data": numpy.array([1.0, 2.0, 3.5])}, msg, numpy=True)
+    assert msg.data == [1.0, 2.0, 3.5]
+    val = msgconv.extract_values(msg, numpy=True)
+    assert isinstance(val["data"], numpy.ndarray)
+    assert val["data"].dtype == numpy.float64
+    assert val["data"].tolist() == [1.0, 2.0, 3.5]
+    # the default mode is not affected
+    assert msgconv.extract_values(msg)["data"] == [1.0, 2.0, 3.5]
+
+
+def test_UInt8MultiArray_numpy_view():
+    if numpy is None:
+        raise nose.SkipTest("numpy not found")
+    msg = std_msgs.UInt8MultiArray()
+    msgconv.populate_instance({"data": numpy.array([0, 1, 2], dtype=numpy.uint8)}, msg, numpy=True)
+    assert msg.data == b"\x00\x01\x02"
+    val = msgconv.extract_values(msg, numpy=True)
+    # binary data is viewed, not copied
+    assert not val["data"].flags.owndata
+    assert val["data"].tolist() == [0, 1, 2]
+
+
+def test_UInt8MultiArray_numpy_binary():
+    if numpy is None:
+        raise nose.SkipTest("numpy not found")
+    msg = std_msgs.UInt8MultiArray()
+    # raw bytes are not base64 decoded, numpy or not
+    msgconv.populate_instance({"data": b"QUJD"}, msg, numpy=True, binary=True)
+    assert msg.data == b"QUJD"
+    val = msgconv.extract_values(msg, numpy=True, binary=True)
+    assert val["data"].tolist() == [ord(c) for c in "QUJD"]
+    msg = msgconv.populate_instance(val, std_msgs.UInt8MultiArray(), numpy=True, binary=True)
+    assert msg.data == b"QUJD"
+
+
+def test_populate_reset():
+    pool = msgconv.get_msg_pool(std_msgs.Float64MultiArray)
+    assert msgconv.get_msg_pool(std_msgs.Float64MultiArray) is pool
+    msg = pool.get()
+    msgconv.populate_instance({
+        "layout": {"dim": [{"label": "x", "size": 3, "stride": 3}], "data_offset": 2},
+        "data": [1.0, 2.0, 3.5]
+    }, msg, reset=True)
+    layout = msg.layout
+    pool.put(msg)
+
+    # the instance is reused, and the fields not in the new message are back to their default value
+    msg = pool.get()
+    msgconv.populate_instance({"layout": {"data_offset": 1}}, msg, reset=True)
+    assert msg.layout is layout
+    assert msgconv.extract_values(msg) == msgconv.extract_values(msgconv.populate_instance({"layout": {"data_offset": 1}}, std_msgs.Float64MultiArray()))
+
+
 def test_msg_exception_pickle():
     exc = msgconv.NonexistentFieldException("message type", ["field1", "field2"])
 
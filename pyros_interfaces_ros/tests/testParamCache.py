@@ -0,0 +1,64 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import sys
+
+# This is needed if running this test directly (without using nose loader)
+if __name__ == '__main__':
+    # prepending because ROS relies on package dirs list in PYTHONPATH and not isolated virtualenvs
+    # And we need our current module to be found first, before any similar package from another workspace
+    current_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+    # if not current_path in sys.path:
+    sys.path.insert(1, current_path)  # sys.path[0] is always current path as per python spec
+
+
+# Unit test import
+from pyros_interfaces_ros.param_cache import ParamCache, get_param_cache
+
+# useful test tools
+import pytest
+
+
+# Only the local tree update is tested here. Subscription needs a running master.
+def make_cache(namespace, tree):
+    cache = ParamCache(namespace)
+    cache._tree = tree  # as if we subscribed already
+    return cache
+
+
+def test_set_delete():
+    cache = make_cache('/pyros', {})
+    cache.set('/pyros/node/subscribers/topic', True)
+    cache.set('/pyros/node/publishers/topic', False)
+    assert cache.get() == {'node': {'subscribers': {'topic': True}, 'publishers': {'topic': False}}}
+    cache.delete('/pyros/node/subscribers')
+    assert cache.get() == {'node': {'publishers': {'topic': False}}}
+    assert cache.version == 3
+
+
+def test_parent_notification():
+    cache = make_cache('/pyros', {'node': {}})
+    assert cache._apply('/', {'pyros': {'other_node': {}}, 'other': 42})
+    assert cache.get() == {'other_node': {}}
+
+
+def test_unrelated_notification():
+    cache = make_cache('/pyros', {'node': {}})
+    assert not cache._apply('/other', 42)
+    assert cache.get() == {'node': {}}
+    assert cache.version == 0
+
+
+def test_shared_close():
+    first = get_param_cache('/test_shared_close')
+    second = get_param_cache('/test_shared_close/')
+    assert first is second
+    first._tree = {'param': 42}  # as if we subscribed already
+    # another user still needs the subscription
+    first.close()
+    assert first.subscribed
+    assert second.get() == {'param': 42}
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
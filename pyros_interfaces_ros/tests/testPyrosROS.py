@@ -171,6 +171,90 @@ class TestPyrosROS(unittest.TestCase):
             print("setup providers : {svc}".format(svc=setup.providers))
             nose.tools.assert_equal(len(setup.providers), 1)
             nose.tools.assert_true(rosn.name in [p[0] for p in setup.providers])
+
+            print("Discovering publishers_snapshot Service...")
+            publishers_snapshot = pyzmp.discover("publishers_snapshot", 5)  # we wait a bit to let it time to start
+            nose.tools.assert_true(publishers_snapshot is not None)
+            print("publishers_snapshot providers : {svc}".format(svc=publishers_snapshot.providers))
+            nose.tools.assert_equal(len(publishers_snapshot.providers), 1)
+            nose.tools.assert_true(rosn.name in [p[0] for p in publishers_snapshot.providers])
+
+            print("Discovering publisher_batch Service...")
+            publisher_batch = pyzmp.discover("publisher_batch", 5)  # we wait a bit to let it time to start
+            nose.tools.assert_true(publisher_batch is not None)
+            print("publisher_batch providers : {svc}".format(svc=publisher_batch.providers))
+            nose.tools.assert_equal(len(publisher_batch.providers), 1)
+            nose.tools.assert_true(rosn.name in [p[0] for p in publisher_batch.providers])
+
+            print("Discovering publisher_poll Service...")
+            publisher_poll = pyzmp.discover("publisher_poll", 5)  # we wait a bit to let it time to start
+            nose.tools.assert_true(publisher_poll is not None)
+            print("publisher_poll providers : {svc}".format(svc=publisher_poll.providers))
+            nose.tools.assert_equal(len(publisher_poll.providers), 1)
+            nose.tools.assert_true(rosn.name in [p[0] for p in publisher_poll.providers])
+
+            print("Discovering publisher_history Service...")
+            publisher_history = pyzmp.discover("publisher_history", 5)  # we wait a bit to let it time to start
+            nose.tools.assert_true(publisher_history is not None)
+            print("publisher_history providers : {svc}".format(svc=publisher_history.providers))
+            nose.tools.assert_equal(len(publisher_history.providers), 1)
+            nose.tools.assert_true(rosn.name in [p[0] for p in publisher_history.providers])
+
+            print("Discovering publisher_stream_open Service...")
+            publisher_stream_open = pyzmp.discover("publisher_stream_open", 5)  # we wait a bit to let it time to start
+            nose.tools.assert_true(publisher_stream_open is not None)
+            print("publisher_stream_open providers : {svc}".format(svc=publisher_stream_open.providers))
+            nose.tools.assert_equal(len(publisher_stream_open.providers), 1)
+            nose.tools.assert_true(rosn.name in [p[0] for p in publisher_stream_open.providers])
+
+            print("Discovering publisher_stream_read Service...")
+            publisher_stream_read = pyzmp.discover("publisher_stream_read", 5)  # we wait a bit to let it time to start
+            nose.tools.assert_true(publisher_stream_read is not None)
+            print("publisher_stream_read providers : {svc}".format(svc=publisher_stream_read.providers))
+            nose.tools.assert_equal(len(publisher_stream_read.providers), 1)
+            nose.tools.assert_true(rosn.name in [p[0] for p in publisher_stream_read.providers])
+
+            print("Discovering publisher_stream_close Service...")
+            publisher_stream_close = pyzmp.discover("publisher_stream_close", 5)  # we wait a bit to let it time to start
+            nose.tools.assert_true(publisher_stream_close is not None)
+            print("publisher_stream_close providers : {svc}".format(svc=publisher_stream_close.providers))
+            nose.tools.assert_equal(len(publisher_stream_close.providers), 1)
+            nose.tools.assert_true(rosn.name in [p[0] for p in publisher_stream_close.providers])
+
+            print("Discovering publish_many Service...")
+            publish_many = pyzmp.discover("publish_many", 5)  # we wait a bit to let it time to start
+            nose.tools.assert_true(publish_many is not None)
+            print("publish_many providers : {svc}".format(svc=publish_many.providers))
+            nose.tools.assert_equal(len(publish_many.providers), 1)
+            nose.tools.assert_true(rosn.name in [p[0] for p in publish_many.providers])
+
+            print("Discovering publish_batch Service...")
+            publish_batch = pyzmp.discover("publish_batch", 5)  # we wait a bit to let it time to start
+            nose.tools.assert_true(publish_batch is not None)
+            print("publish_batch providers : {svc}".format(svc=publish_batch.providers))
+            nose.tools.assert_equal(len(publish_batch.providers), 1)
+            nose.tools.assert_true(rosn.name in [p[0] for p in publish_batch.providers])
+
+            print("Discovering publisher_serialized Service...")
+            publisher_serialized = pyzmp.discover("publisher_serialized", 5)  # we wait a bit to let it time to start
+            nose.tools.assert_true(publisher_serialized is not None)
+            print("publisher_serialized providers : {svc}".format(svc=publisher_serialized.providers))
+            nose.tools.assert_equal(len(publisher_serialized.providers), 1)
+            nose.tools.assert_true(rosn.name in [p[0] for p in publisher_serialized.providers])
+
+            print("Discovering subscriber_serialized Service...")
+            subscriber_serialized = pyzmp.discover("subscriber_serialized", 5)  # we wait a bit to let it time to start
+            nose.tools.assert_true(subscriber_serialized is not None)
+            print("subscriber_serialized providers : {svc}".format(svc=subscriber_serialized.providers))
+            nose.tools.assert_equal(len(subscriber_serialized.providers), 1)
+            nose.tools.assert_true(rosn.name in [p[0] for p in subscriber_serialized.providers])
+
+            print("Discovering service_serialized Service...")
+            service_serialized = pyzmp.discover("service_serialized", 5)  # we wait a bit to let it time to start
+            nose.tools.assert_true(service_serialized is not None)
+            print("service_serialized providers : {svc}".format(svc=service_serialized.providers))
+            nose.tools.assert_equal(len(service_serialized.providers), 1)
+            nose.tools.assert_true(rosn.name in [p[0] for p in service_serialized.providers])
         finally:
             # finishing PyrosROS process
             if rosn is not None and rosn.is_alive():
@@ -0,0 +1,68 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import sys
+import time
+
+# This is needed if running this test directly (without using nose loader)
+if __name__ == '__main__':
+    # prepending because ROS relies on package dirs list in PYTHONPATH and not isolated virtualenvs
+    # And we need our current module to be found first, before any similar package from another workspace
+    current_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+    # if not current_path in sys.path:
+    sys.path.insert(1, current_path)  # sys.path[0] is always current path as per python spec
+
+
+# Unit test import
+from pyros_interfaces_ros import throttle as throttle_module
+from pyros_interfaces_ros.throttle import Throttle
+
+# useful test tools
+import pytest
+
+
+def test_keep_latest():
+    calls = []
+    throttle = Throttle(10)
+    assert throttle(calls.append, 0) == (True, None)
+    # too early : only the latest is kept, and run later
+    for i in range(1, 5):
+        assert throttle(calls.append, i) == (False, None)
+    assert calls == [0]
+    time.sleep(0.2)
+    assert calls == [0, 4]
+    assert throttle.dropped == 3
+
+
+def test_cancel():
+    calls = []
+    throttle = Throttle(10)
+    throttle(calls.append, 0)
+    throttle(calls.append, 1)
+    throttle.cancel()
+    time.sleep(0.2)
+    assert calls == [0]
+    assert throttle.dropped == 1
+
+
+def test_clock_going_back():
+    clock = [100.0]
+    monotonic = throttle_module.monotonic
+    throttle_module.monotonic = lambda: clock[0]
+    try:
+        calls = []
+        throttle = Throttle(10)
+        throttle(calls.append, 0)
+        # the call is not delayed until the clock catches up
+        clock[0] = 50.0
+        assert throttle(calls.append, 1) == (True, None)
+        clock[0] = 50.05
+        assert throttle(calls.append, 2) == (False, None)
+        assert throttle._timer.interval <= throttle.period
+        throttle.cancel()
+    finally:
+        throttle_module.monotonic = monotonic
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
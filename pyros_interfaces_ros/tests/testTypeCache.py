@@ -0,0 +1,87 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import sys
+import tempfile
+
+# This is needed if running this test directly (without using nose loader)
+if __name__ == '__main__':
+    # prepending because ROS relies on package dirs list in PYTHONPATH and not isolated virtualenvs
+    # And we need our current module to be found first, before any similar package from another workspace
+    current_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+    # if not current_path in sys.path:
+    sys.path.insert(1, current_path)  # sys.path[0] is always current path as per python spec
+
+
+# Unit test import
+from pyros_interfaces_ros.type_cache import TypeCache, _nested_msg_types
+
+# useful test tools
+import pytest
+
+# Test all standard message
+import std_msgs.msg as std_msgs
+
+
+def cache_path():
+    return os.path.join(tempfile.mkdtemp(), 'pyros', 'type_cache.json')
+
+
+def test_msg_descriptor():
+    cache = TypeCache(cache_path())
+    desc = cache.get_msg(std_msgs.Float64MultiArray)
+    assert desc['name'] == 'std_msgs/Float64MultiArray'
+    assert desc['md5sum'] == std_msgs.Float64MultiArray._md5sum
+    assert desc['slots'] == ['layout', 'data']
+    assert set(desc['deps']) == set(['std_msgs/MultiArrayLayout', 'std_msgs/MultiArrayDimension'])
+
+
+def test_warm_restart():
+    path = cache_path()
+    cache = TypeCache(path)
+    cache.get_msg(std_msgs.String)
+    # written in a batch, later, or when flushed
+    assert not os.path.exists(path)
+    cache.flush()
+
+    # another process reading the cache, without loading the message class
+    cache = TypeCache(path)
+    desc = cache.get('std_msgs/String')
+    assert desc['slots'] == ['data']
+    assert desc['slot_types'] == ['string']
+    assert isinstance(desc['slot_types'][0], str)
+    # a descriptor is valid only for its md5sum
+    assert cache.get('std_msgs/String', md5sum='0' * 32) is None
+
+
+def test_stale_deps():
+    cache = TypeCache(cache_path())
+    cache.get_msg(std_msgs.Float64MultiArray)
+    md5sum = std_msgs.Float64MultiArray._md5sum
+    assert cache.get('std_msgs/Float64MultiArray', md5sum) is not None
+    # a nested type refreshed with another definition invalidates the descriptors depending on it
+    layout = cache.get_msg(std_msgs.MultiArrayLayout)
+    cache.put(dict(layout, md5sum='0' * 32))
+    assert cache.get('std_msgs/Float64MultiArray', md5sum) is None
+
+
+def test_fixed_size_arrays():
+    class Msg(object):
+        _slot_types = ['std_msgs/Header[3]', 'float64[9]', 'std_msgs/String[]']
+    assert set(_nested_msg_types(Msg)) == set(['std_msgs/Header', 'std_msgs/String'])
+
+
+def test_corrupted_cache():
+    path = cache_path()
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as f:
+        f.write('{not json')
+    cache = TypeCache(path)
+    assert cache.get('std_msgs/String') is None
+    cache.get_msg(std_msgs.String)
+    cache.flush()
+    assert TypeCache(path).get('std_msgs/String') is not None
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
@@ -0,0 +1,80 @@
+from __future__ import absolute_import
+
+import logging
+import threading
+
+from .util import monotonic
+
+# create logger
+_logger = logging.getLogger(__name__)
+# and let it propagate to parent logger, or other handler
+# the user of pyros should configure handlers
+
+
+class Throttle(object):
+    """
+    Throttle limits the rate of calls, with keep-latest semantics :
+    a call coming too early is not run, but kept pending, replacing any previous pending call,
+    and run as soon as the rate allows. The calls replaced are dropped, and counted.
+
+    Nothing is done for a dropped call, so it is cheap to throttle before any conversion.
+    """
+
+    def __init__(self, max_rate):
+        """
+        :param max_rate: the maximum number of calls run per second
+        """
+        self.period = 1.0 / max_rate
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._last = None
+        # the latest call not run yet, as (fun, args)
+        self._pending = None
+        self._timer = None
+
+    def __call__(self, fun, *args):
+        """
+        Calls fun(*args) now if the rate allows it.
+        :return: a tuple (run, result of fun). run is False if the call is pending.
+        """
+        with self._lock:
+            now = monotonic()
+            # a negative elapsed time means the clock went back : not waiting for it to catch up
+            if self._timer is None and (self._last is None or not 0 <= now - self._last < self.period):
+                self._last = now
+                run = True
+            else:
+                if self._pending is not None:
+                    self.dropped += 1
+                self._pending = (fun, args)
+                if self._timer is None:
+                    delay = max(0, min(self.period, self._last + self.period - now))
+                    self._timer = threading.Timer(delay, self._run_pending)
+                    self._timer.daemon = True
+                    self._timer.start()
+                run = False
+        return (True, fun(*args)) if run else (False, None)
+
+    def _run_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._timer = None
+            self._last = monotonic()
+        if pending is not None:
+            fun, args = pending
+            try:
+                fun(*args)
+            except Exception as e:  # nobody is there to catch it, in the timer thread
+                _logger.error("Throttled call {fun} failed : {e}".format(fun=fun, e=e))
+
+    def cancel(self):
+        """
+        Drops the pending call, if any
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending is not None:
+                self._pending = None
+                self.dropped += 1
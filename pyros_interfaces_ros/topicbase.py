@@ -1,11 +1,19 @@
 from __future__ import absolute_import
 
+import logging
+import threading
 from importlib import import_module
 
 import roslib
 
 from .api import rospy_safe as rospy
 from .message_conversion import get_msg, get_msg_dict
+from .type_cache import get_type_cache
+
+# create logger
+_logger = logging.getLogger(__name__)
+# and let it propagate to parent logger, or other handler
+# the user of pyros should configure handlers
 
 
 def get_topic_msg(topic):
@@ -59,14 +67,55 @@ class TopicBase(object):
         self.rostype_name = topic_type
         self.rostype = getattr(msg_module, topic_type_name)
 
-        self.msgtype = get_topic_msg_dict(self)
+        self.msgtype = dict(zip(self.rostype.__slots__, self.rostype._slot_types))
+        # refreshing the type descriptor on disk, for the processes describing this type later.
+        # This is optional, it must not prevent interfacing the topic.
+        try:
+            get_type_cache().get_msg(self.rostype)
+        except Exception as e:
+            _logger.warning("Cannot store the descriptor of {type} in the type cache : {e}".format(type=topic_type, e=e))
+
+        # readiness is signaled by the pool, when rospy gets a connection for this topic
+        self.ready = threading.Event()
+        self._ready_lock = threading.Lock()
+        self._ready_cbs = []
+
+    def _on_connection(self):
+        """
+        Called by the pool (from a rospy thread) when the topic gets a connection
+        """
+        with self._ready_lock:
+            self.ready.set()
+            cbs, self._ready_cbs = self._ready_cbs, []
+        for cb in cbs:
+            cb(self)
+
+    def on_ready(self, cb):
+        """
+        Registers a callback to call when the topic gets its first connection.
+        The callback is called immediately if the topic is already connected.
+        :param cb: the callback, with the topic interface as argument
+        """
+        with self._ready_lock:
+            if not self.ready.is_set():
+                self._ready_cbs.append(cb)
+                return
+        cb(self)
+
+    def wait_ready(self, timeout=None):
+        """
+        Blocks until the topic gets its first connection
+        :param timeout: the maximum time to wait, in seconds
+        :return: True if the topic is connected
+        """
+        return self.ready.wait(timeout)
 
     def cleanup(self):
         """
         Launched when we want to whithhold this interface instance
         :return:
         """
-        pass
+        self.pool.remove_connection_callback(self.name, self._on_connection)
 
     def asdict(self):
         """
@@ -80,6 +129,7 @@ class TopicBase(object):
             'fullname': self.name,  # for BWcompat
             'msgtype': self.msgtype,
             'rostype_name': self.rostype_name,
+            'rostype_md5sum': self.rostype._md5sum,
         }
 
 
@@ -0,0 +1,199 @@
+from __future__ import absolute_import
+
+import errno
+import json
+import logging
+import os
+import re
+import threading
+
+from .util import load_type
+
+# create logger
+_logger = logging.getLogger(__name__)
+# and let it propagate to parent logger, or other handler
+# the user of pyros should configure handlers
+
+# array suffixes, variable length "[]" or fixed length like "[3]"
+_array_braces = re.compile(r'\[\d*\]$')
+
+
+def _msg_fields(msg_class):
+    return {
+        'md5sum': msg_class._md5sum,
+        'slots': list(msg_class.__slots__),
+        'slot_types': list(msg_class._slot_types),
+    }
+
+
+def _nested_msg_types(msg_class, deps=None):
+    """
+    Walks all the message types nested in msg_class, importing them.
+    :return: a dict {type name: msg class}
+    """
+    if deps is None:
+        deps = {}
+    for slot_type in msg_class._slot_types:
+        if '/' not in slot_type:
+            continue
+        slot_type = _array_braces.sub('', slot_type)
+        if slot_type not in deps:
+            deps[slot_type] = load_type(slot_type)
+            _nested_msg_types(deps[slot_type], deps)
+    return deps
+
+
+def describe_msg(msg_class):
+    """
+    Builds the descriptor of a message type.
+    Since the md5sum of a ROS message covers all the nested types,
+    the descriptors of the nested types are stored along, in 'deps'.
+    """
+    desc = _msg_fields(msg_class)
+    desc['name'] = msg_class._type
+    desc['deps'] = dict((name, _msg_fields(cls)) for name, cls in _nested_msg_types(msg_class).items())
+    return desc
+
+
+def _byteify(data):
+    """
+    json gives us unicode strings, but the rest of pyros (and rospy) expects str
+    """
+    if isinstance(data, dict):
+        return dict((_byteify(k), _byteify(v)) for k, v in data.items())
+    elif isinstance(data, list):
+        return [_byteify(d) for d in data]
+    elif isinstance(data, unicode):
+        return data.encode('utf-8')
+    return data
+
+
+class TypeCache(object):
+    """
+    TypeCache stores descriptors of message types (slots, slot types, md5sum) on disk,
+    so that describing a type with all its nested types (see definitions.get_all_msg_fields)
+    does not need to import the message packages. Interfacing a type still imports it.
+
+    Descriptors are stored by type name, and a descriptor is valid only for the md5sum it was built with.
+    When a type is actually loaded (to interface with a topic or a service), its descriptor is refreshed.
+    Changes are written to disk in batches, save_delay seconds after the first one, and on flush().
+    """
+
+    def __init__(self, path, save_delay=1.0):
+        self.path = path
+        self.save_delay = save_delay
+        self._lock = threading.RLock()
+        self._types = None
+        # pending save, for the changes not written yet
+        self._save_timer = None
+
+    def _load(self):
+        if self._types is None:
+            try:
+                with open(self.path) as f:
+                    self._types = _byteify(json.load(f))
+            except IOError as e:
+                if e.errno != errno.ENOENT:
+                    _logger.warning("Cannot read type cache {path} : {e}".format(path=self.path, e=e))
+                self._types = {}
+            except ValueError as e:
+                _logger.warning("Corrupted type cache {path}, starting a new one : {e}".format(path=self.path, e=e))
+                self._types = {}
+        return self._types
+
+    def save(self):
+        """
+        Writes the cache to disk. The file is replaced atomically, so concurrent readers are not disturbed.
+        """
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            types = self._load()
+            tmp_path = self.path + '.' + str(os.getpid()) + '.tmp'
+            try:
+                if not os.path.exists(os.path.dirname(self.path)):
+                    os.makedirs(os.path.dirname(self.path))
+                with open(tmp_path, 'w') as f:
+                    json.dump(types, f)
+                os.rename(tmp_path, self.path)
+            except (IOError, OSError) as e:
+                _logger.warning("Cannot write type cache {path} : {e}".format(path=self.path, e=e))
+
+    def get(self, type_name, md5sum=None):
+        """
+        Returns the descriptor for this type, or None if it is not cached or is stale.
+        A descriptor is stale if one of its nested types is now cached with another md5sum.
+        :param md5sum: the md5sum expected. None accepts the last descriptor stored for this type.
+        """
+        with self._lock:
+            types = self._load()
+            desc = types.get(type_name)
+            if desc is None or md5sum is not None and desc['md5sum'] != md5sum:
+                return None
+            # the nested types may have been refreshed since : their descriptors must still agree
+            for dep_name, dep in desc.get('deps', {}).items():
+                current = types.get(dep_name)
+                if 'md5sum' not in dep or current is not None and current['md5sum'] != dep['md5sum']:
+                    return None
+        return desc
+
+    def put(self, desc):
+        with self._lock:
+            self._load()[desc['name']] = desc
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(self.save_delay, self.save)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def flush(self):
+        """
+        Writes the changes not saved yet, if any.
+        """
+        with self._lock:
+            if self._save_timer is not None:
+                self.save()
+
+    def get_msg(self, msg_class):
+        """
+        Returns the descriptor for a loaded message class, building and storing it if needed.
+        """
+        desc = self.get(msg_class._type, msg_class._md5sum)
+        if desc is None:
+            desc = describe_msg(msg_class)
+            self.put(desc)
+        return desc
+
+    def get_srv(self, srv_class):
+        """
+        Returns the descriptor for a loaded service class, building and storing it if needed.
+        The request and response descriptors are stored as messages, and referred to by name.
+        """
+        desc = self.get(srv_class._type, srv_class._md5sum)
+        if desc is None:
+            self.get_msg(srv_class._request_class)
+            self.get_msg(srv_class._response_class)
+            desc = {
+                'name': srv_class._type,
+                'md5sum': srv_class._md5sum,
+                'request': srv_class._request_class._type,
+                'response': srv_class._response_class._type,
+            }
+            self.put(desc)
+        return desc
+
+
+_type_cache = None
+_type_cache_lock = threading.Lock()
+
+
+def get_type_cache():
+    """
+    Returns the type cache of this process, stored under ROS_HOME.
+    """
+    global _type_cache
+    with _type_cache_lock:
+        if _type_cache is None:
+            ros_home = os.environ.get('ROS_HOME', os.path.join(os.path.expanduser("~"), '.ros'))
+            _type_cache = TypeCache(os.path.join(ros_home, 'pyros', 'type_cache.json'))
+    return _type_cache
@@ -1,8 +1,54 @@
 from __future__ import absolute_import
 
 from importlib import import_module
+import logging
+import os
 import re
 
+from pyros_interfaces_common.regex_tools import cap_match_string
+
+try:
+    from time import monotonic
+except ImportError:  # python 2
+    try:
+        from monotonic import monotonic  # the backport, if installed
+    except ImportError:
+        monotonic = None
+
+if monotonic is None:
+    import ctypes
+    import ctypes.util
+    import sys
+
+    class _Timespec(ctypes.Structure):
+        _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+    _CLOCK_MONOTONIC = 1  # from linux/time.h
+    try:
+        if not sys.platform.startswith('linux'):
+            raise OSError("CLOCK_MONOTONIC id is only known on linux")
+        # clock_gettime is in librt for glibc < 2.17, and in libc afterwards
+        _clock_gettime = ctypes.CDLL(ctypes.util.find_library('rt') or ctypes.util.find_library('c'), use_errno=True).clock_gettime
+        _clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(_Timespec)]
+    except (OSError, AttributeError):
+        _clock_gettime = None
+
+    if _clock_gettime is not None:
+        def monotonic():
+            """ time in seconds from the monotonic clock, which never goes back when the system time is set """
+            t = _Timespec()
+            if _clock_gettime(_CLOCK_MONOTONIC, ctypes.byref(t)) != 0:
+                errno = ctypes.get_errno()
+                raise OSError(errno, os.strerror(errno))
+            return t.tv_sec + t.tv_nsec * 1e-9
+    else:  # last resort : the wall clock. Users of monotonic() must cope with it going back.
+        from time import time as monotonic
+
+# create logger
+_logger = logging.getLogger(__name__)
+# and let it propagate to parent logger, or other handler
+# the user of pyros should configure handlers
+
 
 def get_json_bool(b):
     if b:
@@ -14,8 +60,8 @@ def type_str(msg):
     return msg.__module__.split('.')[0] + '/' + msg.__name__
 
 def load_type(msg_type_name):
-    if msg_type_name.endswith('[]'):
-        msg_type_name = msg_type_name[:-2]
+    # stripping array braces, variable length "[]" or fixed length like "[3]"
+    msg_type_name = re.sub(r'\[\d*\]$', '', msg_type_name)
     module_name, type_name = msg_type_name.split('/')
     msg_module = import_module(module_name + '.msg')
     # we should try to load the full service type if not found in msg (without needing Request or Response suffix)
@@ -24,3 +70,35 @@ def load_type(msg_type_name):
     if not hasattr(msg_module,type_name):
         raise TypeError('Unknown ROS msg {0!s}'.format(msg_type_name))
     return getattr(msg_module,type_name)
+
+
+def type_index(types):
+    """
+    Builds a name -> type index from a list of [name, type] pairs, as returned by the master API.
+    If an index is passed, it is returned as is, so that one index can be shared between pools.
+    :param types: a list of [name, type] pairs, or an index already built
+    :return: a dict {name: type}
+    """
+    if isinstance(types, dict):
+        return types
+    # reversed, so that the first type found for a name is the one we keep
+    return dict((t[0], t[1]) for t in reversed(types) if len(t) > 1)
+
+
+def regex_options(name, options):
+    """
+    Gathers the options for an interface, from a dict {regex: options dict}.
+    If several regexes match the name, their options are merged. The exact name takes precedence,
+    then the longest regex, since it is usually the most specific one.
+    :param name: the name of the interface (topic, service, etc.)
+    :param options: a dict {regex: options dict}, or None
+    :return: the options dict for this name, possibly empty
+    """
+    merged = {}
+    for regex in sorted(options or {}, key=lambda r: (r == name, len(r))):
+        try:
+            if re.match(cap_match_string(regex), name):
+                merged.update(options[regex])
+        except re.error:
+            _logger.warning('Ignoring invalid regex string "{0!s}"!'.format(regex))
+    return merged